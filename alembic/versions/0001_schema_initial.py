@@ -0,0 +1,146 @@
+"""Schéma initial (tables créées auparavant par create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-06 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "utilisateurs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("sexe", sa.Enum("HOMME", "FEMME", "AUTRE", name="gender"), nullable=False),
+        sa.Column("nom", sa.String(length=100), nullable=False),
+        sa.Column("prenom", sa.String(length=100), nullable=False),
+        sa.Column("telephone", sa.String(length=100), nullable=False),
+        sa.Column("recevoirMails", sa.Boolean(), nullable=False),
+        sa.Column("rgpd", sa.Boolean(), nullable=False),
+        sa.Column("email", sa.String(length=100), nullable=False),
+        sa.Column("mot_de_passe", sa.String(length=255), nullable=False),
+        sa.Column("date_creation", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_table(
+        "images",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("file", sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "adresses",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nom", sa.String(length=100), nullable=False),
+        sa.Column("prenom", sa.String(length=100), nullable=False),
+        sa.Column("adresse", sa.String(length=255), nullable=False),
+        sa.Column("complement", sa.String(length=255), nullable=False),
+        sa.Column("ville", sa.String(length=100), nullable=False),
+        sa.Column("code_postal", sa.String(length=10), nullable=False),
+        sa.Column("pays", sa.String(length=100), nullable=False),
+        sa.Column("utilisateur_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["utilisateur_id"], ["utilisateurs.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "commandes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("date_commande", sa.DateTime(), nullable=False),
+        sa.Column(
+            "statut",
+            sa.Enum("EN_ATTENTE", "EN_COURS", "EN_LIVRAISON", "LIVRE", "ANNULE", name="statutcommande"),
+            nullable=False,
+        ),
+        sa.Column("utilisateur_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["utilisateur_id"], ["utilisateurs.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "bois",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nom", sa.String(length=100), nullable=False),
+        sa.Column("image_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["image_id"], ["images.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "rals",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nom", sa.String(length=100), nullable=False),
+        sa.Column("image_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["image_id"], ["images.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "produits",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nom", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.String(length=500), nullable=True),
+        sa.Column("prix", sa.Float(), nullable=False),
+        sa.Column("bois_id", sa.Integer(), nullable=True),
+        sa.Column("ral_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "categorie",
+            sa.Enum(
+                "PORTAIL_COULISSANT", "PORTAIL_BATTANT", "PORTILLON", "ACCESSOIRE_PORTAIL", "PERGOLA", "MOTORISATION",
+                name="categorie",
+            ),
+            nullable=False,
+        ),
+        sa.Column("hauteur", sa.Float(), nullable=False),
+        sa.Column("largeur", sa.Float(), nullable=False),
+        sa.Column("mitEnAvant", sa.Boolean(), nullable=False),
+        sa.Column("meilleurVente", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["bois_id"], ["bois.id"]),
+        sa.ForeignKeyConstraint(["ral_id"], ["rals.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "commande_produit",
+        sa.Column("commande_id", sa.Integer(), nullable=False),
+        sa.Column("produit_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["commande_id"], ["commandes.id"]),
+        sa.ForeignKeyConstraint(["produit_id"], ["produits.id"]),
+        sa.PrimaryKeyConstraint("commande_id", "produit_id"),
+    )
+    op.create_table(
+        "produit_image",
+        sa.Column("produit_id", sa.Integer(), nullable=False),
+        sa.Column("image_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["image_id"], ["images.id"]),
+        sa.ForeignKeyConstraint(["produit_id"], ["produits.id"]),
+        sa.PrimaryKeyConstraint("produit_id", "image_id"),
+    )
+    op.create_table(
+        "produit_options",
+        sa.Column("produit_id", sa.Integer(), nullable=False),
+        sa.Column("option_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["option_id"], ["produits.id"]),
+        sa.ForeignKeyConstraint(["produit_id"], ["produits.id"]),
+        sa.PrimaryKeyConstraint("produit_id", "option_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("produit_options")
+    op.drop_table("produit_image")
+    op.drop_table("commande_produit")
+    op.drop_table("produits")
+    op.drop_table("rals")
+    op.drop_table("bois")
+    op.drop_table("commandes")
+    op.drop_table("adresses")
+    op.drop_table("images")
+    op.drop_table("utilisateurs")
+    sa.Enum(name="categorie").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="statutcommande").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="gender").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""Compteurs de version du catalogue (ETag / Last-Modified)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-06 10:05:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "table_versions",
+        sa.Column("nom", sa.String(length=50), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("date_modification", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("nom"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("table_versions")
@@ -0,0 +1,35 @@
+"""Empreinte SHA-256 et déclinaisons des images
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-06 10:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Mode batch : ALTER TABLE direct quand SQLite le permet (ajout de colonnes nullables)
+    with op.batch_alter_table("images") as batch_op:
+        batch_op.add_column(sa.Column("empreinte", sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column("variantes", sa.JSON(), nullable=True))
+
+    if op.get_bind().dialect.name == "postgresql":
+        # Construction sans verrou d'écriture sur la table (hors transaction)
+        with op.get_context().autocommit_block():
+            op.create_index("ix_images_empreinte", "images", ["empreinte"], unique=True, postgresql_concurrently=True)
+    else:
+        op.create_index("ix_images_empreinte", "images", ["empreinte"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_images_empreinte", table_name="images")
+    with op.batch_alter_table("images") as batch_op:
+        batch_op.drop_column("variantes")
+        batch_op.drop_column("empreinte")
@@ -0,0 +1,41 @@
+"""File de tâches de fond persistante
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-06 10:15:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "taches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nom", sa.String(length=100), nullable=False),
+        sa.Column("parametres", sa.JSON(), nullable=False),
+        sa.Column(
+            "statut",
+            sa.Enum("en-attente", "en-cours", "terminee", "echec", name="statuttache"),
+            nullable=False,
+        ),
+        sa.Column("tentatives", sa.Integer(), nullable=False),
+        sa.Column("erreur", sa.Text(), nullable=True),
+        sa.Column("date_creation", sa.DateTime(), nullable=False),
+        sa.Column("date_execution", sa.DateTime(), nullable=False),
+        sa.Column("date_modification", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_taches_statut", "taches", ["statut"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_taches_statut", table_name="taches")
+    op.drop_table("taches")
+    sa.Enum(name="statuttache").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,76 @@
+"""Index plein texte des produits
+
+SQLite : table virtuelle FTS5 alimentée depuis les produits existants.
+Postgres : index GIN sur l'expression tsvector utilisée par SearchService.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-01-06 10:20:00
+"""
+import os
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# DDL et normalisation figées à cette révision (copie de src/services/search.py au
+# moment de la migration) : une évolution de l'application passe par une nouvelle révision
+FTS_DDL = "CREATE VIRTUAL TABLE produits_fts USING fts5(nom, description, tokenize='unicode61 remove_diacritics 2')"
+# Même configuration que SearchService (SEARCH_PG_CONFIG) : l'expression doit être identique à celle des requêtes
+PG_CONFIG = os.getenv("SEARCH_PG_CONFIG", "french")
+PG_INDEX = (
+    "CREATE INDEX CONCURRENTLY ix_produits_recherche ON produits USING gin "
+    "(to_tsvector('{config}'::regconfig, coalesce(nom, '') || ' ' || coalesce(description, '')))"
+)
+
+_WORD = re.compile(r"\w+")
+
+
+def _fold(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("aux"):
+        return word[:-3] + "al"
+    if len(word) > 3 and word[-1] in "sx":
+        word = word[:-1]
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def _analyze(value) -> str:
+    return " ".join(_stem(word) for word in _WORD.findall(_fold(value or "")))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute(FTS_DDL)
+        rows = bind.execute(sa.text("SELECT id, nom, description FROM produits")).all()
+        if rows:
+            bind.execute(
+                sa.text("INSERT INTO produits_fts (rowid, nom, description) VALUES (:rowid, :nom, :description)"),
+                [{"rowid": produit_id, "nom": _analyze(nom), "description": _analyze(description)} for produit_id, nom, description in rows],
+            )
+    elif bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute(PG_INDEX.format(config=PG_CONFIG.replace("'", "''")))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS produits_fts")
+    elif bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index("ix_produits_recherche", table_name="produits", postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""Index des filtres et tris des listes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-01-06 10:25:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# (nom, table, colonnes, options)
+INDEXES = [
+    ("ix_adresses_utilisateur_id", "adresses", ["utilisateur_id"], {}),
+    ("ix_commande_produit_produit_id", "commande_produit", ["produit_id"], {}),
+    ("ix_produit_image_image_id", "produit_image", ["image_id"], {}),
+    ("ix_produit_options_option_id", "produit_options", ["option_id"], {}),
+    ("ix_commandes_date_commande", "commandes", ["date_commande", "id"], {}),
+    ("ix_commandes_utilisateur_date", "commandes", ["utilisateur_id", "date_commande", "id"], {}),
+    ("ix_commandes_statut_date", "commandes", ["statut", "date_commande", "id"], {}),
+    ("ix_produits_prix", "produits", ["prix", "id"], {}),
+    ("ix_produits_categorie", "produits", ["categorie", "id"], {}),
+    ("ix_produits_categorie_prix", "produits", ["categorie", "prix", "id"], {}),
+    ("ix_produits_hauteur", "produits", ["hauteur"], {}),
+    ("ix_produits_largeur", "produits", ["largeur"], {}),
+    ("ix_produits_bois_id", "produits", ["bois_id"], {}),
+    ("ix_produits_ral_id", "produits", ["ral_id"], {}),
+    ("ix_produits_mis_en_avant", "produits", ["id"], {
+        "sqlite_where": sa.text("mitEnAvant = 1"), "postgresql_where": sa.text('"mitEnAvant"'),
+    }),
+    ("ix_produits_meilleure_vente", "produits", ["id"], {
+        "sqlite_where": sa.text("meilleurVente = 1"), "postgresql_where": sa.text('"meilleurVente"'),
+    }),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CREATE INDEX CONCURRENTLY : les écritures continuent pendant la construction,
+        # mais l'instruction ne peut pas s'exécuter dans une transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns, options in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, **options)
+    else:
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, **options)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,34 @@
+"""Version des tokens d'accès des utilisateurs (révocation)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-01-06 10:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Valeur par défaut côté serveur : les lignes existantes passent à la version 0 sans réécriture
+    with op.batch_alter_table("utilisateurs") as batch_op:
+        batch_op.add_column(sa.Column("token_version", sa.Integer(), nullable=False, server_default=sa.text("0")))
+        batch_op.add_column(sa.Column("date_revocation", sa.DateTime(), nullable=True))
+
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index("ix_utilisateurs_date_revocation", "utilisateurs", ["date_revocation"], postgresql_concurrently=True)
+    else:
+        op.create_index("ix_utilisateurs_date_revocation", "utilisateurs", ["date_revocation"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_utilisateurs_date_revocation", table_name="utilisateurs")
+    with op.batch_alter_table("utilisateurs") as batch_op:
+        batch_op.drop_column("date_revocation")
+        batch_op.drop_column("token_version")
@@ -0,0 +1,378 @@
+"""
+Benchmark reproductible de l'API : chaque route de src/routes/models.py et
+src/routes/auth.py est appelée en processus (ASGI, httpx) à concurrence
+fixe, sur une base SQLite jetable remplie d'un jeu de données synthétique
+(utilisateurs, adresses, commandes, produits avec bois, RAL, images et
+options). Débit et latences p50 / p95 / p99 par route.
+
+Tout est créé dans un répertoire temporaire (base, fichiers, déclinaisons) :
+le benchmark ne touche ni sql_app.db ni src/upload. Le générateur aléatoire
+est initialisé par --seed : deux exécutions appellent les mêmes URLs.
+
+- --output : résultats en JSON, à conserver pour comparer les exécutions
+- --baseline : compare à un JSON précédent ; code de sortie 1 si une route
+  régresse (p95 au-delà de --tolerance, débit en deçà), si une route répond
+  en erreur ou si une route n'a pas de scénario (utilisable en CI)
+
+Usage : python -m scripts.bench_api --produits 2000 --concurrency 16 --output bench.json
+        python -m scripts.bench_api --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import atexit
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple
+
+# Les moteurs, le stockage et les répertoires de fichiers sont créés à
+# l'import de src, relativement au répertoire courant : on se place dans le
+# répertoire du benchmark avant tout import de l'application
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CWD = os.getcwd()
+WORKDIR = tempfile.mkdtemp(prefix="bench-api-")
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+sys.path.insert(0, ROOT)
+os.chdir(WORKDIR)
+# SQLite même si un .env configure Postgres ; ni profileur SQL ni EXPLAIN des requêtes lentes pendant la mesure
+os.environ.update({"POSTGRES_SERVER": "", "QUERY_PROFILER_SAMPLE_RATE": "0", "QUERY_SLOW_THRESHOLD": "0"})
+os.environ.setdefault("SECRET_KEY", "bench-api")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx  # noqa: E402
+from PIL import Image as PILImage  # noqa: E402
+from sqlalchemy import insert, text  # noqa: E402
+
+from src.database import Base, SessionLocal, dispose_async_engines, engine  # noqa: E402
+from src.main import app  # noqa: E402
+from src.models.models import (RAL, Adresse, Bois, Categorie, Commande,  # noqa: E402
+                               Gender, Image, Produit, StatutCommande,
+                               Utilisateur, commande_produit, produit_image,
+                               produit_options)
+from src.routes.auth import router as auth_router  # noqa: E402
+from src.routes.models import router as models_router  # noqa: E402
+from src.services.file import upload_file  # noqa: E402
+from src.services.search import create_search_index  # noqa: E402
+from src.tasks import get_password_hash, shutdown_hashing_executor  # noqa: E402
+
+PASSWORD = "bench-password"
+NOW = datetime(2025, 1, 1)
+# Utilisateur connecté des routes authentifiées, utilisateur de /auth/reset-password
+AUTH_USER = 1
+RESET_USER = 2
+
+
+def email(index: int) -> str:
+    return f"u{index}@bench.example"
+
+
+def png(rng: random.Random, size: int = 64) -> bytes:
+    output = io.BytesIO()
+    PILImage.new("RGB", (size, size), tuple(rng.randrange(256) for _ in range(3))).save(output, format="PNG")
+    return output.getvalue()
+
+
+def seed(sizes: dict, rng: random.Random) -> None:
+    """Jeu de données synthétique, identifiants 1..n dans chaque table."""
+    Base.metadata.create_all(engine)
+    mot_de_passe = get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        # Images par l'ORM : sqlalchemy-file écrit les fichiers dans le stockage
+        db.add_all([
+            Image(filename=f"image-{i}.png", file=upload_file(png(rng), f"image-{i}.png", "image/png"))
+            for i in range(sizes["images"])
+        ])
+        db.flush()
+        db.execute(insert(Bois), [{"nom": f"bois {i}", "image_id": rng.randint(1, sizes["images"])} for i in range(sizes["bois"])])
+        db.execute(insert(RAL), [{"nom": f"RAL {i}", "image_id": rng.randint(1, sizes["images"])} for i in range(sizes["rals"])])
+        db.execute(insert(Utilisateur), [
+            {"sexe": rng.choice(list(Gender)).value, "nom": f"nom {i}", "prenom": f"prénom {i}", "telephone": "0600000000",
+             "email": email(i + 1), "mot_de_passe": mot_de_passe}
+            for i in range(sizes["utilisateurs"])
+        ])
+        db.execute(insert(Adresse), [
+            {"nom": "nom", "prenom": "prénom", "adresse": f"{i} rue du Bench", "complement": "", "ville": "Lyon",
+             "code_postal": "69000", "pays": "France", "utilisateur_id": utilisateur_id}
+            for i, utilisateur_id in enumerate(
+                utilisateur_id for utilisateur_id in range(1, sizes["utilisateurs"] + 1) for _ in range(rng.randint(1, 2))
+            )
+        ])
+        db.execute(insert(Produit), [
+            {"nom": f"{rng.choice(['Portail', 'Portillon', 'Pergola', 'Moteur'])} {rng.choice(['chêne', 'alu', 'acier'])} {i}",
+             "description": f"Description du produit {i}", "prix": round(rng.uniform(50, 10000), 2),
+             "categorie": rng.choice(list(Categorie)), "hauteur": rng.uniform(50, 300), "largeur": rng.uniform(50, 600),
+             "bois_id": rng.randint(1, sizes["bois"]), "ral_id": rng.randint(1, sizes["rals"]),
+             "mitEnAvant": rng.random() < 0.02, "meilleurVente": rng.random() < 0.02}
+            for i in range(sizes["produits"])
+        ])
+        db.execute(insert(produit_image), [
+            {"produit_id": produit_id, "image_id": image_id}
+            for produit_id in range(1, sizes["produits"] + 1)
+            for image_id in rng.sample(range(1, sizes["images"] + 1), min(3, sizes["images"]))
+        ])
+        db.execute(insert(produit_options), [
+            {"produit_id": produit_id, "option_id": option_id}
+            for produit_id in range(1, sizes["produits"] + 1)
+            for option_id in set(rng.randint(1, sizes["produits"]) for _ in range(rng.randint(0, 3))) - {produit_id}
+        ])
+        db.execute(insert(Commande), [
+            {"statut": rng.choice(list(StatutCommande)), "utilisateur_id": rng.randint(1, sizes["utilisateurs"]),
+             "date_commande": NOW - timedelta(days=rng.uniform(0, 1095))}
+            for _ in range(sizes["commandes"])
+        ])
+        db.execute(insert(commande_produit), [
+            {"commande_id": commande_id, "produit_id": produit_id}
+            for commande_id in range(1, sizes["commandes"] + 1)
+            for produit_id in set(rng.randint(1, sizes["produits"]) for _ in range(rng.randint(1, 4)))
+        ])
+        db.commit()
+
+    # Les INSERT en masse ne passent pas par les événements ORM : index de recherche reconstruit
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS produits_fts"))
+        create_search_index(connection)
+        connection.execute(text("ANALYZE"))
+
+
+class Scenario(NamedTuple):
+    """Requête d'une route : `build(rng, contexte)` renvoie les arguments de httpx.request."""
+    build: Callable[[random.Random, dict], dict]
+    # Hachage bcrypt : nombre de requêtes réduit (--heavy-requests)
+    heavy: bool = False
+
+
+def get(url: Callable[[random.Random, dict], str], **options) -> Scenario:
+    return Scenario(lambda rng, ctx: {"method": "GET", "url": url(rng, ctx)}, **options)
+
+
+def post(url: str, body: Callable[[random.Random, dict], dict], auth: bool = False, **options) -> Scenario:
+    def build(rng, ctx):
+        return {"method": "POST", "url": url, **body(rng, ctx), **({"headers": ctx["headers"]} if auth else {})}
+    return Scenario(build, **options)
+
+
+def pick(table: str) -> Callable[[random.Random, dict], int]:
+    return lambda rng, ctx: rng.randint(1, ctx["sizes"][table])
+
+
+def commande(rng: random.Random, ctx: dict) -> dict:
+    return {"produit_ids": [pick("produits")(rng, ctx) for _ in range(rng.randint(1, 4))]}
+
+
+def register(rng: random.Random, ctx: dict) -> dict:
+    ctx["inscrits"] += 1
+    return {"json": {"email": f"inscrit{ctx['inscrits']}@bench.example", "mot_de_passe": PASSWORD,
+                     "sexe": "AUTRE", "nom": "nom", "prenom": "prénom", "telephone": "0600000000"}}
+
+
+def upload(rng: random.Random, ctx: dict) -> dict:
+    return {"files": {"file": ("bench.png", png(rng, 32), "image/png")}}
+
+
+# Clé : « MÉTHODE gabarit », comme les étiquettes de route de /metrics
+SCENARIOS: Dict[str, Scenario] = {
+    "GET /models/images/": get(lambda rng, ctx: "/models/images/"),
+    "GET /models/images/{image_id}": get(lambda rng, ctx: f"/models/images/{pick('images')(rng, ctx)}"),
+    "POST /models/images/": post("/models/images/", upload, auth=True),
+    "GET /models/images/{image_id}/file": get(lambda rng, ctx: f"/models/images/{pick('images')(rng, ctx)}/file"),
+    "GET /models/images/{image_id}/rendition": get(
+        lambda rng, ctx: f"/models/images/{pick('images')(rng, ctx)}/rendition?width={rng.choice([320, 640])}"
+    ),
+    "GET /models/bois/": get(lambda rng, ctx: "/models/bois/"),
+    "GET /models/bois/{bois_id}": get(lambda rng, ctx: f"/models/bois/{pick('bois')(rng, ctx)}"),
+    "GET /models/rals/": get(lambda rng, ctx: "/models/rals/"),
+    "GET /models/rals/{ral_id}": get(lambda rng, ctx: f"/models/rals/{pick('rals')(rng, ctx)}"),
+    "GET /models/adresses/": get(lambda rng, ctx: "/models/adresses/"),
+    "GET /models/adresses/{adresse_id}": get(lambda rng, ctx: f"/models/adresses/{pick('utilisateurs')(rng, ctx)}"),
+    "GET /models/utilisateurs/{utilisateur_id}/adresses": get(
+        lambda rng, ctx: f"/models/utilisateurs/{pick('utilisateurs')(rng, ctx)}/adresses"
+    ),
+    "GET /models/produits/": get(lambda rng, ctx: f"/models/produits/?limit=50&prix_max={rng.choice([500, 2000, 5000])}"),
+    "GET /models/produits/categorie/{categorie}": get(
+        lambda rng, ctx: f"/models/produits/categorie/{rng.choice(list(Categorie)).value}"
+    ),
+    "GET /models/produits/meilleurs-ventes": get(lambda rng, ctx: "/models/produits/meilleurs-ventes"),
+    "GET /models/produits/mis-en-avant": get(lambda rng, ctx: "/models/produits/mis-en-avant"),
+    "GET /models/produits/search": get(
+        lambda rng, ctx: f"/models/produits/search?q={rng.choice(['portail', 'pergola chêne', 'alu', 'moteur'])}"
+    ),
+    "GET /models/produits/{produit_id}": get(lambda rng, ctx: f"/models/produits/{pick('produits')(rng, ctx)}"),
+    "GET /models/commandes/": get(lambda rng, ctx: f"/models/commandes/?statut={rng.choice(list(StatutCommande)).value}"),
+    "GET /models/commandes/{commande_id}": get(lambda rng, ctx: f"/models/commandes/{pick('commandes')(rng, ctx)}"),
+    "POST /models/commandes/": post("/models/commandes/", lambda rng, ctx: {"json": commande(rng, ctx)}, auth=True),
+    "POST /models/commandes/batch": post(
+        "/models/commandes/batch", lambda rng, ctx: {"json": [commande(rng, ctx) for _ in range(50)]}, auth=True
+    ),
+    "GET /models/utilisateurs/{utilisateur_id}/commandes": get(
+        lambda rng, ctx: f"/models/utilisateurs/{pick('utilisateurs')(rng, ctx)}/commandes"
+    ),
+    "GET /models/utilisateurs/": get(lambda rng, ctx: "/models/utilisateurs/"),
+    "GET /models/utilisateurs/{utilisateur_id}": get(lambda rng, ctx: f"/models/utilisateurs/{pick('utilisateurs')(rng, ctx)}"),
+    "GET /models/utilisateurs/email/{email}": get(
+        lambda rng, ctx: f"/models/utilisateurs/email/{email(pick('utilisateurs')(rng, ctx))}"
+    ),
+    "POST /auth/register": post("/auth/register", register, heavy=True),
+    "POST /auth/login": post(
+        "/auth/login", lambda rng, ctx: {"json": {"email": email(AUTH_USER), "mot_de_passe": PASSWORD}}, heavy=True
+    ),
+    "POST /auth/token": post(
+        "/auth/token", lambda rng, ctx: {"data": {"username": email(AUTH_USER), "password": PASSWORD}}, heavy=True
+    ),
+    # Même mot de passe : l'utilisateur reste utilisable, sur un compte distinct du compte connecté
+    "POST /auth/reset-password": post("/auth/reset-password", lambda rng, ctx: {"json": {
+        "email": email(RESET_USER), "ancien_mot_de_passe": PASSWORD, "nouveau_mot_de_passe": PASSWORD,
+    }}, heavy=True),
+}
+
+
+def missing_scenarios() -> List[str]:
+    """Routes des routeurs sans scénario : une nouvelle route doit être ajoutée au benchmark."""
+    routes = [
+        f"{method} {prefix}{route.path}"
+        for prefix, router in (("/models", models_router), ("/auth", auth_router))
+        for route in router.routes
+        for method in sorted(route.methods - {"HEAD"})
+    ]
+    return [route for route in routes if route not in SCENARIOS]
+
+
+def percentile(values: List[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+async def measure(client: httpx.AsyncClient, scenario: Scenario, ctx: dict, rng: random.Random,
+                  requests: int, concurrency: int) -> dict:
+    # URLs tirées d'avance : l'ordre d'exécution concurrent ne change pas le scénario
+    calls = [scenario.build(rng, ctx) for _ in range(requests)]
+    latencies: List[float] = []
+    errors: Dict[int, int] = {}
+    queue = iter(calls)
+
+    async def worker():
+        for call in queue:
+            start = time.perf_counter()
+            response = await client.request(**call)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requetes": requests,
+        "erreurs": errors,
+        "debit": requests / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run(args, sizes: dict) -> Dict[str, dict]:
+    rng = random.Random(args.seed)
+    ctx = {"sizes": sizes, "inscrits": 0}
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/auth/login", json={"email": email(AUTH_USER), "mot_de_passe": PASSWORD})
+        ctx["headers"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for name, scenario in SCENARIOS.items():
+            if args.route and not any(part in name for part in args.route):
+                continue
+            requests = args.heavy_requests if scenario.heavy else args.requests
+            # Préchauffage hors mesure (caches, déclinaisons, connexions du pool)
+            await measure(client, scenario, ctx, rng, min(args.warmup, requests), args.concurrency)
+            results[name] = await measure(client, scenario, ctx, rng, requests, args.concurrency)
+            report_route(name, results[name])
+    await dispose_async_engines()
+    return results
+
+
+def report_route(name: str, result: dict) -> None:
+    errors = " ".join(f"{status}x{count}" for status, count in result["erreurs"].items())
+    print(f"{name:55} {result['debit']:8.1f} req/s  p50 {result['p50_ms']:7.1f}  p95 {result['p95_ms']:7.1f}"
+          f"  p99 {result['p99_ms']:7.1f} ms  {errors}", flush=True)
+
+
+def regressions(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, min_delta_ms: float) -> List[str]:
+    """Routes plus lentes que la référence au-delà de la tolérance (écarts sous `min_delta_ms` ignorés)."""
+    failures = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = max(reference["p95_ms"] * (1 + tolerance), reference["p95_ms"] + min_delta_ms)
+        if result["p95_ms"] > limit:
+            failures.append(f"{name} : p95 {result['p95_ms']:.1f} ms > {limit:.1f} ms (référence {reference['p95_ms']:.1f})")
+        if result["debit"] < reference["debit"] / (1 + tolerance) and result["p95_ms"] > reference["p95_ms"] + min_delta_ms:
+            failures.append(f"{name} : débit {result['debit']:.1f} req/s < {reference['debit'] / (1 + tolerance):.1f}"
+                            f" (référence {reference['debit']:.1f})")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utilisateurs", type=int, default=1000)
+    parser.add_argument("--produits", type=int, default=2000)
+    parser.add_argument("--commandes", type=int, default=5000)
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--bois", type=int, default=20)
+    parser.add_argument("--rals", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requêtes mesurées par route")
+    parser.add_argument("--heavy-requests", type=int, default=20, help="requêtes mesurées par route d'authentification (bcrypt)")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--route", action="append", help="ne mesurer que les routes contenant ce texte (répétable)")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="JSON d'une exécution de référence")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="régression tolérée (0.25 = +25 %% de p95)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="écart de p95 toujours toléré, en ms")
+    args = parser.parse_args()
+
+    sizes = {name: getattr(args, name) for name in ("utilisateurs", "produits", "commandes", "images", "bois", "rals")}
+    missing = missing_scenarios()
+    for route in missing:
+        print(f"Route sans scénario : {route}")
+
+    start = time.perf_counter()
+    seed(sizes, random.Random(args.seed))
+    print(f"Jeu de données : {', '.join(f'{count} {name}' for name, count in sizes.items())}"
+          f" ({time.perf_counter() - start:.1f} s) ; concurrence {args.concurrency}\n")
+    try:
+        results = asyncio.run(run(args, sizes))
+    finally:
+        shutdown_hashing_executor()
+
+    if args.output:
+        with open(os.path.join(CWD, args.output), "w") as output:
+            json.dump({
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "parametres": {**sizes, "concurrency": args.concurrency, "requests": args.requests,
+                               "heavy_requests": args.heavy_requests, "seed": args.seed},
+                "routes": results,
+            }, output, indent=2, ensure_ascii=False)
+
+    failures = [f"{name} : erreurs {result['erreurs']}" for name, result in results.items() if result["erreurs"]]
+    failures += [f"{route} : aucun scénario" for route in missing]
+    if args.baseline:
+        with open(os.path.join(CWD, args.baseline)) as baseline:
+            failures += regressions(results, json.load(baseline)["routes"], args.tolerance, args.min_delta_ms)
+    print("\n" + ("\n".join(failures) if failures else "Aucune régression"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Benchmark des connexions (/auth/login) : logins/sec avec le hachage bcrypt
+exécuté dans la boucle d'événements (comportement d'origine, un seul cœur)
+puis déporté dans le pool de processus de src.tasks.
+
+Usage : python -m scripts.bench_login --requests 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import delete
+
+import src.services.auth as auth_service
+from src.database import SessionLocal, dispose_async_engines
+from src.main import app
+from src.models.models import Utilisateur
+from src.tasks import (get_hashing_executor, shutdown_hashing_executor,
+                       verify_password)
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-password"
+
+
+async def inline_verify_password(plain_password, hashed_password) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def run(requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login():
+            async with semaphore:
+                response = await client.post("/auth/login", json={"email": EMAIL, "mot_de_passe": PASSWORD})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+async def compare(requests: int, concurrency: int):
+    original = auth_service.verify_password_async
+    auth_service.verify_password_async = inline_verify_password
+    try:
+        before = await run(requests, concurrency)
+    finally:
+        auth_service.verify_password_async = original
+
+    # Démarrage des processus du pool hors mesure
+    list(get_hashing_executor().map(verify_password, [PASSWORD] * 4, [""] * 4))
+    after = await run(requests, concurrency)
+
+    await dispose_async_engines()
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        db.execute(delete(Utilisateur).where(Utilisateur.email == EMAIL))
+        db.add(Utilisateur(sexe="AUTRE", nom="Bench", prenom="Bench", telephone="0", email=EMAIL, mot_de_passe=PASSWORD))
+        db.commit()
+
+        before, after = asyncio.run(compare(args.requests, args.concurrency))
+
+        print(f"bcrypt dans la boucle : {before:8.1f} logins/s")
+        print(f"pool de hachage       : {after:8.1f} logins/s  (x{after / before:.2f})")
+    finally:
+        shutdown_hashing_executor()
+        db.execute(delete(Utilisateur).where(Utilisateur.email == EMAIL))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark de la sérialisation des réponses sur /models/produits/ et
+/models/utilisateurs/ :
+
+- chemin FastAPI par défaut : validation, dump_python(mode="json") puis json.dumps
+- chemin SchemaRoute : validation puis dump_json (bytes directement)
+- débit de bout en bout des deux routes sur l'application (ASGI, en processus)
+
+Usage : python -m scripts.bench_serialization --iterations 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from src.database import SessionLocal, dispose_async_engines
+from src.main import app
+from src.responses import dump_json, get_adapter
+from src.schemas.models import Produit, Utilisateur
+from src.schemas.pagination import Page
+from src.services.models import ProduitService, UtilisateurService
+
+ROUTES = {
+    "/models/produits/": (Page[Produit], ProduitService.get_page),
+    "/models/utilisateurs/": (Page[Utilisateur], UtilisateurService.get_page),
+}
+
+
+def fastapi_default(schema, value) -> bytes:
+    adapter = get_adapter(schema)
+    content = adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+async def throughput(path: str, limit: int, iterations: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call():
+            async with semaphore:
+                (await client.get(path, params={"limit": limit})).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(iterations)))
+        elapsed = time.perf_counter() - start
+    await dispose_async_engines()
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for path, (schema, get_page) in ROUTES.items():
+            value = get_page(db, None, args.limit)
+            size = len(dump_json(schema, value))
+            before = timed(lambda: fastapi_default(schema, value), args.iterations)
+            after = timed(lambda: dump_json(schema, value), args.iterations)
+            rps = asyncio.run(throughput(path, args.limit, args.iterations, args.concurrency))
+            print(f"{path} ({len(value['items'])} éléments, {size / 1024:.0f} Ko)")
+            print(f"  sérialisation FastAPI : {before:8.1f} réponses/s")
+            print(f"  sérialisation directe : {after:8.1f} réponses/s  (x{after / before:.2f})")
+            print(f"  route complète        : {rps:8.1f} requêtes/s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
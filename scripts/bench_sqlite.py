@@ -0,0 +1,141 @@
+"""
+Benchmark de concurrence SQLite : lectures (page de produits) et écritures
+(lecture d'un produit puis création d'une commande) mélangées, sur des
+processus qui simulent des workers uvicorn, pendant une durée fixe.
+
+- défaut : configuration d'origine (journal rollback, synchronous=FULL, un
+  seul pool pour tout, transaction ouverte par pysqlite à la première écriture)
+- profil : profil SQLite de src/config.py (WAL, pragmas), writer unique par
+  processus (BEGIN IMMEDIATE) et pool de lecteurs (RoutingSession)
+
+Chaque configuration tourne sur sa propre copie d'une base synthétique
+(données de scripts/dataset.py).
+
+Usage : python -m scripts.bench_sqlite --processes 2 --concurrency 16 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from scripts.dataset import COMMANDES, PRODUITS, UTILISATEURS, seed
+from src.config import DB_POOL_SIZE
+from src.database import (Base, RoutingSession, create_sqlite_engines,
+                          routing_options)
+from src.models.models import Commande, Produit, StatutCommande
+from src.services.async_models import ProduitService
+
+CONFIGURATIONS = ("défaut", "profil")
+
+
+def sessionmaker_for(configuration: str, path: str):
+    url = f"sqlite+aiosqlite:///{path}"
+    if configuration == "défaut":
+        engine = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=DB_POOL_SIZE)
+        return [engine], async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    writer, reader = create_sqlite_engines(url, create=create_async_engine, read_pool_size=DB_POOL_SIZE,
+                                           poolclass=AsyncAdaptedQueuePool)
+    sessions = async_sessionmaker(sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+                                  **routing_options(writer, reader))
+    return [writer, reader], sessions
+
+
+async def workload(configuration: str, path: str, concurrency: int, duration: float, write_ratio: float) -> dict:
+    engines, sessions = sessionmaker_for(configuration, path)
+    latencies = {"lecture": [], "écriture": []}
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(seed_value: int):
+        nonlocal errors
+        rng = random.Random(seed_value)
+        while time.perf_counter() < deadline:
+            kind = "écriture" if rng.random() < write_ratio else "lecture"
+            start = time.perf_counter()
+            try:
+                async with sessions() as db:
+                    if kind == "lecture":
+                        await ProduitService.get_page(db, None, 20)
+                    else:
+                        produit = await db.get(Produit, rng.randint(1, PRODUITS))
+                        db.add(Commande(statut=StatutCommande.EN_ATTENTE, utilisateur_id=rng.randint(1, UTILISATEURS),
+                                        produits=[produit]))
+                        await db.commit()
+            except OperationalError:
+                # « database is locked »
+                errors += 1
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client(os.getpid() * 1000 + index) for index in range(concurrency)))
+    for engine in engines:
+        await engine.dispose()
+    return {"latences": latencies, "erreurs": errors}
+
+
+def run_process(configuration: str, path: str, concurrency: int, duration: float, write_ratio: float) -> dict:
+    return asyncio.run(workload(configuration, path, concurrency, duration, write_ratio))
+
+
+def percentile(values, q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def report(configuration: str, results, duration: float) -> float:
+    latencies = {kind: [value for result in results for value in result["latences"][kind]] for kind in ("lecture", "écriture")}
+    errors = sum(result["erreurs"] for result in results)
+    total = sum(len(values) for values in latencies.values())
+    print(f"{configuration:7} {total / duration:8.1f} op/s   erreurs « locked » : {errors}")
+    for kind, values in latencies.items():
+        print(f"  {kind:9} {len(values) / duration:8.1f} /s   p50 {percentile(values, 50) * 1000:7.1f} ms"
+              f"   p95 {percentile(values, 95) * 1000:7.1f} ms")
+    return total / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=16, help="clients simultanés par processus")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = os.path.join(directory, "modele.db")
+        engine = create_engine(f"sqlite:///{template}")
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            seed(db)
+        engine.dispose()
+        print(f"{PRODUITS} produits, {COMMANDES} commandes ; {args.processes} processus x {args.concurrency} clients,"
+              f" {args.write_ratio:.0%} d'écritures, {args.duration:g} s\n")
+
+        throughput = {}
+        for configuration in CONFIGURATIONS:
+            path = os.path.join(directory, f"{configuration}.db")
+            shutil.copyfile(template, path)
+            with ProcessPoolExecutor(args.processes) as pool:
+                futures = [
+                    pool.submit(run_process, configuration, path, args.concurrency, args.duration, args.write_ratio)
+                    for _ in range(args.processes)
+                ]
+                results = [future.result() for future in futures]
+            throughput[configuration] = report(configuration, results, args.duration)
+        print(f"\nDébit : x{throughput['profil'] / throughput['défaut']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
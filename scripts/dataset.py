@@ -0,0 +1,44 @@
+"""
+Jeu de données synthétique (produits, commandes, utilisateurs) analysé par
+ANALYZE, pour que le planificateur SQLite décide comme en production.
+Partagé par tests/test_indexes.py et scripts/bench_sqlite.py.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from src.models.models import (Categorie, Commande, Produit, StatutCommande,
+                               Utilisateur)
+
+PRODUITS = 5000
+COMMANDES = 5000
+UTILISATEURS = 500
+NOW = datetime(2025, 1, 1)
+
+
+def seed(db: Session) -> None:
+    rng = random.Random(0)
+    db.execute(insert(Utilisateur), [
+        {"sexe": "AUTRE", "nom": "n", "prenom": "p", "telephone": "0", "email": f"u{i}@example.com", "mot_de_passe": "$2b$"}
+        for i in range(UTILISATEURS)
+    ])
+    db.execute(insert(Produit), [
+        {
+            "nom": f"produit {i}", "prix": rng.uniform(0, 10000), "categorie": rng.choice(list(Categorie)),
+            "hauteur": rng.uniform(50, 300), "largeur": rng.uniform(50, 600),
+            "bois_id": rng.randint(1, 20), "ral_id": rng.randint(1, 20),
+            "mitEnAvant": rng.random() < 0.02, "meilleurVente": rng.random() < 0.02,
+        }
+        for i in range(PRODUITS)
+    ])
+    db.execute(insert(Commande), [
+        {
+            "statut": rng.choice(list(StatutCommande)), "utilisateur_id": rng.randint(1, UTILISATEURS),
+            "date_commande": NOW - timedelta(days=rng.uniform(0, 1095)),
+        }
+        for _ in range(COMMANDES)
+    ])
+    db.commit()
+    db.execute(text("ANALYZE"))
@@ -7,8 +7,10 @@ load_dotenv()
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_SERVER = os.getenv("POSTGRES_SERVER")
-POSTGRES_PORT = os.getenv("A")
+POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", 5432))
 POSTGRES_DB = os.getenv("POSTGRES_DB")
+# Réplicas en lecture (URLs séparées par des virgules, le driver est choisi par src/database.py)
+POSTGRES_REPLICA_URLS = [url.strip() for url in os.getenv("POSTGRES_REPLICA_URLS", "").split(",") if url.strip()]
 
 TITLE = "Template API FastAPI"
 DESCRIPTION = "This is the API documentation for the Template API FastAPI"
@@ -26,3 +28,109 @@ TAGS_METADATA = [
         "description": "Operations with Auth.",
     },
 ]
+
+# Pagination par curseur des routes de liste
+PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 50))
+PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 500))
+
+# Création de commandes par lot (POST /models/commandes/batch) : nombre maximal par requête
+COMMANDE_BATCH_MAX_SIZE = int(os.getenv("COMMANDE_BATCH_MAX_SIZE", 5000))
+
+# Export NDJSON en streaming : nombre de lignes lues et envoyées par lot
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+
+# Pool de connexions Postgres (et lecteurs SQLite de la couche asynchrone)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 40))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+
+# Profil SQLite appliqué à chaque connexion (valeur vide : défaut de SQLite).
+# WAL : les lectures ne bloquent plus sur les écritures ; NORMAL est sûr en WAL.
+SQLITE_PRAGMAS = {
+    name: value
+    for name, value in {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT", "5000"),  # ms
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),  # négatif : en Kio
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    }.items()
+    if value
+}
+# Lecteurs en parallèle (moteur synchrone) et attente maximale du writer unique, en secondes
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", 8))
+SQLITE_WRITE_TIMEOUT = int(os.getenv("SQLITE_WRITE_TIMEOUT", 30))
+
+# Cache des utilisateurs authentifiés (get_current_user)
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 300))
+
+# Tokens d'accès : durée de vie (minutes), tokens vérifiés gardés en mémoire,
+# intervalle de relecture des révocations en base et recouvrement de la fenêtre
+# relue (secondes : délai de commit et décalage d'horloge entre serveurs)
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 300))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_REVOCATION_REFRESH = float(os.getenv("TOKEN_REVOCATION_REFRESH", 5))
+TOKEN_REVOCATION_OVERLAP = float(os.getenv("TOKEN_REVOCATION_OVERLAP", 60))
+
+# Cache des réponses des données de référence (bois, RAL, images, produits mis en avant)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+
+# Déclinaisons redimensionnées des images (cache disque + pool de workers Pillow)
+RENDITION_CACHE_DIR = os.getenv("RENDITION_CACHE_DIR", "./src/upload/renditions")
+RENDITION_WORKERS = int(os.getenv("RENDITION_WORKERS", os.cpu_count() or 1))
+RENDITION_MAX_SIZE = int(os.getenv("RENDITION_MAX_SIZE", 2048))
+RENDITION_DEFAULT_QUALITY = int(os.getenv("RENDITION_DEFAULT_QUALITY", 80))
+
+# Uploads en flux : taille maximale, taille des blocs et répertoire temporaire (même disque que le stockage)
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", 20 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 64 * 1024))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR", "./src/upload/tmp")
+
+# Tâches de fond (table `taches`, pool de workers dans chaque processus)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 5))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", 600))
+
+# Déclinaisons pré-générées à l'upload d'une image (largeurs en pixels),
+# placeholder flou : côté maximal en pixels et rayon du flou gaussien
+VARIANT_WIDTHS = [int(width) for width in os.getenv("VARIANT_WIDTHS", "320,640,1280").split(",")]
+VARIANT_FORMAT = os.getenv("VARIANT_FORMAT", "webp")
+VARIANT_PLACEHOLDER_SIZE = int(os.getenv("VARIANT_PLACEHOLDER_SIZE", 16))
+VARIANT_PLACEHOLDER_BLUR = float(os.getenv("VARIANT_PLACEHOLDER_BLUR", 1.5))
+
+# Recherche de produits : tranches des facettes de prix et de dimensions,
+# configuration text search Postgres (ex: une config "french" + unaccent)
+SEARCH_PRICE_RANGES = [float(bound) for bound in os.getenv("SEARCH_PRICE_RANGES", "500,1000,2000,5000").split(",")]
+SEARCH_SIZE_RANGES = [float(bound) for bound in os.getenv("SEARCH_SIZE_RANGES", "100,150,200,300").split(",")]
+SEARCH_PG_CONFIG = os.getenv("SEARCH_PG_CONFIG", "french")
+
+# Métriques Prometheus (/metrics) : bornes des histogrammes de latence (secondes),
+# de taille de réponse (octets) et de nombre de requêtes SQL par requête HTTP
+METRICS_LATENCY_BUCKETS = [float(bound) for bound in os.getenv("METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10").split(",")]
+METRICS_SIZE_BUCKETS = [float(bound) for bound in os.getenv("METRICS_SIZE_BUCKETS", "256,1024,4096,16384,65536,262144,1048576,4194304").split(",")]
+METRICS_DB_QUERY_BUCKETS = [float(bound) for bound in os.getenv("METRICS_DB_QUERY_BUCKETS", "0,1,2,3,5,10,20,50,100").split(",")]
+
+# Profileur SQL : part des requêtes HTTP profilées (1 en développement), seuil
+# de détection des N+1 (même requête SQL plus de N fois par requête HTTP),
+# erreur plutôt qu'avertissement sur un N+1 (tests), seuil des requêtes lentes
+# journalisées avec leur plan (secondes, 0 pour désactiver)
+QUERY_PROFILER_SAMPLE_RATE = float(os.getenv("QUERY_PROFILER_SAMPLE_RATE", 0.01))
+QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_PROFILER_N_PLUS_ONE_THRESHOLD", 10))
+QUERY_PROFILER_RAISE = os.getenv("QUERY_PROFILER_RAISE", "false").lower() in ("1", "true")
+QUERY_PROFILER_MAX_SAMPLES = int(os.getenv("QUERY_PROFILER_MAX_SAMPLES", 1000))
+QUERY_SLOW_THRESHOLD = float(os.getenv("QUERY_SLOW_THRESHOLD", 0.5))
+
+# Profileur par échantillonnage (GET /profile, signal) : jeton de la route (route
+# désactivée sans jeton), durée maximale et intervalle entre deux relevés (secondes),
+# signal qui lance un profil de PROFILER_SIGNAL_SECONDS écrit dans PROFILER_OUTPUT_DIR
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN")
+PROFILER_MAX_SECONDS = int(os.getenv("PROFILER_MAX_SECONDS", 60))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", 0.01))
+PROFILER_SIGNAL = os.getenv("PROFILER_SIGNAL", "SIGUSR2")
+PROFILER_SIGNAL_SECONDS = int(os.getenv("PROFILER_SIGNAL_SECONDS", 30))
+PROFILER_OUTPUT_DIR = os.getenv("PROFILER_OUTPUT_DIR", "./profiles")
@@ -1,14 +1,256 @@
-from sqlalchemy import create_engine
+import inspect
+import random
+from functools import wraps
+from typing import Dict, List, Tuple, Union
+
+from sqlalchemy import URL, Engine, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.config import (DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_SIZE,
+                        DB_POOL_TIMEOUT, POSTGRES_DB, POSTGRES_PASSWORD,
+                        POSTGRES_PORT, POSTGRES_REPLICA_URLS, POSTGRES_SERVER,
+                        POSTGRES_USER, SQLITE_PRAGMAS, SQLITE_READ_POOL_SIZE,
+                        SQLITE_WRITE_TIMEOUT)
+
+SQLITE_PATH = "./sql_app.db"
+
+# Drivers (synchrone, asynchrone) par backend
+DRIVERS = {
+    "postgresql": ("postgresql+psycopg2", "postgresql+asyncpg"),
+    "sqlite": ("sqlite", "sqlite+aiosqlite"),
+}
+
+
+def get_database_url(asynchronous: bool = False) -> URL:
+    """Postgres si la configuration est complète (utilisateur, serveur, base), SQLite sinon."""
+    if POSTGRES_USER and POSTGRES_SERVER and POSTGRES_DB:
+        return URL.create(
+            DRIVERS["postgresql"][asynchronous],
+            username=POSTGRES_USER,
+            password=POSTGRES_PASSWORD or None,
+            host=POSTGRES_SERVER,
+            port=POSTGRES_PORT,
+            database=POSTGRES_DB,
+        )
+    return URL.create(DRIVERS["sqlite"][asynchronous], database=SQLITE_PATH)
+
+
+def get_replica_urls(asynchronous: bool = False) -> List[URL]:
+    """URLs des réplicas en lecture (POSTGRES_REPLICA_URLS), avec le driver du primaire."""
+    if get_database_url().get_backend_name() != "postgresql":
+        return []
+    return [make_url(url).set(drivername=DRIVERS["postgresql"][asynchronous]) for url in POSTGRES_REPLICA_URLS]
+
+
+SQLALCHEMY_DATABASE_URL = get_database_url().render_as_string(hide_password=False)
+
+# Option d'exécution lue par l'événement `begin` : transaction d'écriture qui
+# prend le verrou d'écriture dès le BEGIN (attente via busy_timeout) au lieu de
+# lire puis d'échouer avec « database is locked » au moment d'écrire
+WRITE_TRANSACTION = {"sqlite_begin": "BEGIN IMMEDIATE"}
+
+
+def configure_sqlite(engine, pragmas: Dict[str, str], query_only: bool = False):
+    """
+    Applique le profil SQLite (`PRAGMA`) à chaque nouvelle connexion. Les
+    transactions sont ouvertes par SQLAlchemy (BEGIN, ou l'option
+    `sqlite_begin`) et non plus par pysqlite au premier INSERT. Les
+    connexions `query_only` restent en autocommit : chaque lecture voit le
+    dernier état commité, comme avant. Accepte un moteur synchrone ou asynchrone.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if query_only:
+            cursor.execute("PRAGMA query_only = 1")
+        cursor.close()
+
+    if not query_only:
+        @event.listens_for(sync_engine, "begin")
+        def _begin(connection):
+            connection.exec_driver_sql(connection.get_execution_options().get("sqlite_begin", "BEGIN"))
+
+    return engine
+
+
+def create_sqlite_engines(url: Union[str, URL], create=create_engine, read_pool_size: int = SQLITE_READ_POOL_SIZE,
+                          pragmas: Dict[str, str] = SQLITE_PRAGMAS, **kwargs):
+    """
+    Moteurs (écriture, lecture) d'une base SQLite : un writer à une seule
+    connexion, dont le pool sert de file d'attente aux transactions
+    d'écriture du processus, et un pool de lecteurs en lecture seule qui
+    lisent en parallèle grâce au WAL. `create` : create_engine ou create_async_engine.
+    """
+    if make_url(url).get_driver_name() != "aiosqlite":
+        kwargs.setdefault("connect_args", {"check_same_thread": False})
+    writer = create(url, pool_size=1, max_overflow=0, pool_timeout=SQLITE_WRITE_TIMEOUT, **kwargs)
+    # journal_mode est persistant dans le fichier : seul le writer le change
+    reader_pragmas = {name: value for name, value in pragmas.items() if name != "journal_mode"}
+    reader = create(url, pool_size=read_pool_size, max_overflow=0, pool_timeout=DB_POOL_TIMEOUT, **kwargs)
+    return configure_sqlite(writer, pragmas), configure_sqlite(reader, reader_pragmas, query_only=True)
+
+
+def create_postgres_engine(url: Union[str, URL], create=create_engine):
+    return create(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+    )
+
+
+def create_engines(asynchronous: bool = False) -> Tuple:
+    """
+    Moteurs (écriture, lecture, réplicas) de la base configurée. SQLite :
+    writer unique et pool de lecteurs. Postgres : le primaire pour les
+    écritures et les lectures, les réplicas pour les lectures `replica_read`.
+    """
+    url = get_database_url(asynchronous)
+    create = create_async_engine if asynchronous else create_engine
+    if url.get_backend_name() == "sqlite":
+        # Pool explicite : aiosqlite utiliserait sinon un NullPool (une connexion par session)
+        options = {"read_pool_size": DB_POOL_SIZE, "poolclass": AsyncAdaptedQueuePool, "pool_recycle": DB_POOL_RECYCLE} if asynchronous else {}
+        writer, reader = create_sqlite_engines(url, create, **options)
+        return writer, reader, []
+    primary = create_postgres_engine(url, create)
+    return primary, primary, [create_postgres_engine(replica, create) for replica in get_replica_urls(asynchronous)]
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-) 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine) 
-Base = declarative_base() 
+class RoutingSession(Session):
+    """
+    Session qui envoie les écritures (flush, INSERT / UPDATE / DELETE) au
+    moteur `writer` et les lectures au moteur `reader`. Une fois le writer
+    utilisé, le reste de la transaction y est lu : les lectures suivantes
+    voient les écritures de la session.
+
+    Les lectures marquées `replica_read` vont à un réplica (le même pendant
+    toute la session), sauf après un commit d'écriture dans la session : la
+    suite de la requête lit le primaire, les réplicas pouvant être en retard.
+    """
+
+    def __init__(self, *args, writer=None, reader=None, replicas=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+        self.reader = reader if reader is not None else writer
+        self.replicas = list(replicas)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.writer is None:
+            return super().get_bind(mapper, clause, **kwargs)
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["writer"] = True
+        if self.info.get("writer"):
+            return self.writer
+        if self.replicas and self.info.get("replica") and not self.info.get("primary"):
+            if "replica_engine" not in self.info:
+                self.info["replica_engine"] = random.choice(self.replicas)
+            return self.info["replica_engine"]
+        return self.reader
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _read_your_writes(session):
+    if session.info.get("writer"):
+        session.info["primary"] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("writer", None)
+
+
+def replica_read(method):
+    """
+    Exécute une méthode de lecture d'un service (synchrone ou asynchrone) sur
+    un réplica quand il y en a. La session est le premier argument Session /
+    AsyncSession (positionnel ou nommé) : à placer sous @staticmethod ou @classmethod.
+    """
+    def session_info(args, kwargs):
+        return next(arg for arg in (*args, *kwargs.values()) if isinstance(arg, (Session, AsyncSession))).info
+
+    if inspect.iscoroutinefunction(method):
+        @wraps(method)
+        async def wrapper(*args, **kwargs):
+            info = session_info(args, kwargs)
+            previous = info.get("replica")
+            info["replica"] = True
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                info["replica"] = previous
+    else:
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            info = session_info(args, kwargs)
+            previous = info.get("replica")
+            info["replica"] = True
+            try:
+                return method(*args, **kwargs)
+            finally:
+                info["replica"] = previous
+    return wrapper
+
+
+def routing_options(writer, reader, replicas=()) -> dict:
+    """Arguments de sessionmaker / async_sessionmaker pour une RoutingSession."""
+    writer = getattr(writer, "sync_engine", writer)
+    reader = getattr(reader, "sync_engine", reader)
+    if writer.dialect.name == "sqlite":
+        writer = writer.execution_options(**WRITE_TRANSACTION)
+    return {"writer": writer, "reader": reader, "replicas": [getattr(replica, "sync_engine", replica) for replica in replicas]}
+
+
+# `engine` est le writer : admin, migrations et scripts l'utilisent directement
+engine, read_engine, replica_engines = create_engines()
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False,
+    **routing_options(engine, read_engine, replica_engines),
+)
+Base = declarative_base()
 
 def create_database():
-    return Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    return Base.metadata.create_all(bind=engine)
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = get_database_url(asynchronous=True).render_as_string(hide_password=False)
+
+async_engine, async_read_engine, async_replica_engines = create_engines(asynchronous=True)
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    **routing_options(async_engine, async_read_engine, async_replica_engines),
+)
+
+
+async def dispose_async_engines() -> None:
+    for pool_owner in {async_engine, async_read_engine, *async_replica_engines}:
+        await pool_owner.dispose()
+
+
+def named_engines() -> Dict[str, Engine]:
+    """Moteurs synchrones distincts de l'application par rôle (instrumentation)."""
+    engines = {
+        "writer": engine, "reader": read_engine,
+        **{f"replica{index}": replica for index, replica in enumerate(replica_engines)},
+        "async_writer": async_engine.sync_engine, "async_reader": async_read_engine.sync_engine,
+        **{f"async_replica{index}": replica.sync_engine for index, replica in enumerate(async_replica_engines)},
+    }
+    # Postgres : le primaire est à la fois writer et reader
+    distinct = {}
+    for name, sync_engine in engines.items():
+        if sync_engine not in distinct.values():
+            distinct[name] = sync_engine
+    return distinct
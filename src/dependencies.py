@@ -1,19 +1,22 @@
+import secrets
 from contextlib import contextmanager
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import src.tasks as tasks
-from src.database import SessionLocal
-from src.models.models import Utilisateur
-from src.schemas.token import TokenData
-from src.services.models import UtilisateurService
-from src.tasks import ALGORITHM, SECRET_KEY
+from src.config import PROFILER_TOKEN
+from src.database import AsyncSessionLocal, SessionLocal
+from src.services.async_models import UtilisateurService
+from src.services.principals import Principal, principal_cache
+from src.services.tokens import token_revocations, token_verifier
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+profiler_token_header = APIKeyHeader(name="X-Profiler-Token", auto_error=False)
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -22,25 +25,48 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Utilisateur:
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les informations d'identification",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = token_verifier.verify(token)
     except JWTError:
         raise credentials_exception
 
-    user = UtilisateurService.get_by_email(db, token_data.email)
-    if user is None:
+    # Révocations en mémoire : une requête SQL par worker toutes les TOKEN_REVOCATION_REFRESH secondes
+    if token_revocations.needs_refresh():
+        await token_revocations.refresh(db)
+    if token_revocations.is_revoked(token_data.id, token_data.version):
         raise credentials_exception
-    return user
+
+    # Le token a été vérifié ci-dessus, seule la résolution de l'utilisateur est mise en cache
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    principal = await UtilisateurService.get_principal(db, token_data.id)
+    if principal is None:
+        raise credentials_exception
+    if principal.token_version > token_data.version:
+        # Révocation d'un autre worker pas encore relue
+        token_revocations.record(principal.id, principal.token_version)
+        raise credentials_exception
+    principal_cache.set(token, principal)
+    return principal
+
+def require_profiler_token(token: Optional[str] = Depends(profiler_token_header)) -> None:
+    """Routes d'exploitation : jeton PROFILER_TOKEN, route inexistante s'il n'est pas configuré."""
+    if not PROFILER_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if token is None or not secrets.compare_digest(token, PROFILER_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Jeton de profilage invalide")
@@ -1,23 +1,34 @@
 from datetime import datetime
-from os import makedirs
+from os import getpid, makedirs
 from typing import Annotated
 
-from fastapi import Depends, FastAPI, HTTPException
+import anyio
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from libcloud.storage.drivers.local import LocalStorageDriver
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlalchemy.orm import Session
 from sqlalchemy_file.storage import StorageManager
 from starlette_admin import I18nConfig
 from starlette_admin.contrib.sqla import Admin, ModelView
 
-from src.config import DESCRIPTION, TAGS_METADATA, TITLE
-from src.database import create_database, engine
-from src.dependencies import get_current_user
+from src.config import DESCRIPTION, PROFILER_MAX_SECONDS, TAGS_METADATA, TITLE
+from src.database import dispose_async_engines, engine, named_engines
+from src.dependencies import get_current_user, require_profiler_token
+from src.metrics import MetricsMiddleware, instrument_engine, render_metrics
 from src.models.models import *
+from src.profiler import QueryProfilerMiddleware, query_profiler
+from src.responses import FastJSONResponse
 from src.routes.auth import router as auth_router
 from src.routes.models import router as models_router
+from src.sampler import (ProfileMode, ProfilerBusy, SamplingProfiler,
+                         sampling_profiler)
 from src.schemas.models import Utilisateur as UtilisateurSchema
+from src.services.jobs import job_queue
+from src.services.renditions import rendition_service
+from src.tasks import shutdown_hashing_executor
 
 # Configure Storage
 makedirs("./src/upload/attachment", 0o777, exist_ok=True)
@@ -28,11 +39,10 @@ StorageManager.add_storage("default", container)
 app = FastAPI(
     title=TITLE,
     description=DESCRIPTION,
-    openapi_tags=TAGS_METADATA
+    openapi_tags=TAGS_METADATA,
+    default_response_class=FastJSONResponse
 )
 
-create_database()
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -40,6 +50,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryProfilerMiddleware, profiler=query_profiler)
+# Ajouté en dernier : le plus externe, il mesure aussi le CORS
+app.add_middleware(MetricsMiddleware)
+
+for engine_name, database_engine in named_engines().items():
+    instrument_engine(database_engine, engine_name)
+    query_profiler.instrument(database_engine)
 
 admin = Admin(engine, i18n_config = I18nConfig(default_locale="fr"))
 
@@ -58,6 +75,19 @@ admin.add_view(ModelView(Image))
 
 admin.mount_to(app)
 
+@app.on_event("startup")
+async def start_job_workers():
+    job_queue.start()
+    sampling_profiler.install_signal_handler()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    job_queue.stop()
+    await dispose_async_engines()
+    shutdown_hashing_executor()
+    rendition_service.shutdown()
+    query_profiler.log_report()
+
 @app.get("/", tags=["Server"])
 async def root():
     return {"message": "API T is online, welcome to the API documentation at /docs or /redocs"}
@@ -67,6 +97,26 @@ async def read_item():
     unix_timestamp = datetime.now().timestamp()
     return {"unixTime": unix_timestamp}
 
+@app.get("/metrics", tags=["Server"])
+async def metrics():
+    """Métriques au format texte Prometheus"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/profile", tags=["Server"], response_class=PlainTextResponse, dependencies=[Depends(require_profiler_token)])
+async def profile(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    mode: ProfileMode = ProfileMode.WALL,
+):
+    """Profil par échantillonnage du worker (piles repliées pour un flamegraph)"""
+    try:
+        stacks = await anyio.to_thread.run_sync(sampling_profiler.profile, seconds, mode)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Un profil est déjà en cours dans ce worker")
+    return PlainTextResponse(
+        SamplingProfiler.collapse(stacks),
+        headers={"Content-Disposition": f'attachment; filename="profil-{getpid()}-{mode.value}.folded"'},
+    )
+
 
 app.include_router(models_router, prefix="/models", tags=["Models"])
 app.include_router(auth_router, prefix="/auth", tags=["Authentification"])
\ No newline at end of file
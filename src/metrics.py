@@ -0,0 +1,143 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (REGISTRY, CollectorRegistry, Counter,
+                               Gauge, Histogram, generate_latest,
+                               multiprocess)
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from src.config import (METRICS_DB_QUERY_BUCKETS, METRICS_LATENCY_BUCKETS,
+                        METRICS_SIZE_BUCKETS)
+
+REQUESTS = Counter("http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status"))
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP, jusqu'au dernier octet de la réponse",
+    ("method", "route"), buckets=METRICS_LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requêtes HTTP en cours", ("method",), multiprocess_mode="livesum")
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Taille du corps des réponses HTTP",
+    ("method", "route"), buckets=METRICS_SIZE_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Requêtes SQL exécutées par requête HTTP",
+    ("method", "route"), buckets=METRICS_DB_QUERY_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Temps passé en base par requête HTTP",
+    ("method", "route"), buckets=METRICS_LATENCY_BUCKETS,
+)
+# Toutes les requêtes SQL, y compris hors requête HTTP (tâches de fond, admin)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Durée des requêtes SQL", ("engine",), buckets=METRICS_LATENCY_BUCKETS,
+)
+
+
+class RequestTimings:
+    """Compteurs SQL de la requête HTTP en cours (nombre de requêtes, temps en base)."""
+
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+    def server_timing(self, total: float) -> str:
+        return f'db;dur={self.db_time * 1000:.1f};desc="SQL x{self.queries}", app;dur={total * 1000:.1f}'
+
+
+# Propagé aux threads du threadpool (run_in_threadpool copie le contexte) et
+# aux greenlets des sessions asynchrones
+current_request: ContextVar[Optional[RequestTimings]] = ContextVar("current_request", default=None)
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Chronomètre chaque requête SQL d'un moteur (synchrone ou asynchrone)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    histogram = DB_QUERY_DURATION.labels(name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Sur le contexte d'exécution : une requête en erreur ne laisse rien derrière elle
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # EXPLAIN des requêtes lentes (src.profiler) : pas une requête de l'application
+        if conn.info.get("profiler_explain"):
+            return
+        elapsed = time.perf_counter() - context._query_start
+        histogram.observe(elapsed)
+        timings = current_request.get()
+        if timings is not None:
+            timings.queries += 1
+            timings.db_time += elapsed
+
+
+def route_label(scope, root_path: str) -> str:
+    """Gabarit de la route (« /models/produits/{id} ») plutôt que le chemin, pour borner les séries."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    # Application montée (admin) : son préfixe
+    mounted = scope.get("root_path", "")[len(root_path):]
+    return f"{mounted}/*" if mounted else "<non routé>"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : latence, taille de réponse, requêtes en cours et
+    requêtes SQL par route, plus un en-tête `Server-Timing` (temps en base et
+    temps total jusqu'aux en-têtes) lisible dans les outils du navigateur.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        timings = RequestTimings()
+        token = current_request.set(timings)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing(time.perf_counter() - start))
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            in_progress.dec()
+            current_request.reset(token)
+            route = route_label(scope, root_path)
+            REQUESTS.labels(method, route, status).inc()
+            REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            RESPONSE_SIZE.labels(method, route).observe(size)
+            REQUEST_DB_QUERIES.labels(method, route).observe(timings.queries)
+            REQUEST_DB_DURATION.labels(method, route).observe(timings.db_time)
+
+
+def render_metrics() -> bytes:
+    """Exposition Prometheus ; agrège les workers si PROMETHEUS_MULTIPROC_DIR est défini (uvicorn --workers)."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
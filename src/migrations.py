@@ -0,0 +1,110 @@
+"""
+Mise à jour du schéma par Alembic, à lancer une seule fois avant de démarrer
+les workers (`make migrate`, inclus dans `make run`) :
+
+    python -m src.migrations
+
+Une base créée par l'ancien `create_all` (sans table `alembic_version`) est
+d'abord marquée à la dernière révision dont tous les objets (tables,
+colonnes, index) existent, puis mise à jour normalement.
+"""
+import os
+from typing import Dict, List, Tuple
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from src.database import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+BASELINE = "0001"
+
+# Objets créés par chaque révision après le schéma initial, dans l'ordre :
+# ("table", table), ("column", table, colonne) ou ("index", table, index).
+# Figés comme les migrations : à compléter à chaque nouvelle révision.
+REVISION_OBJECTS: List[Tuple[str, List[tuple]]] = [
+    ("0002", [("table", "table_versions")]),
+    ("0003", [("column", "images", "empreinte"), ("column", "images", "variantes"), ("index", "images", "ix_images_empreinte")]),
+    ("0004", [("table", "taches"), ("index", "taches", "ix_taches_statut")]),
+    # Table virtuelle FTS5 sous SQLite, index GIN sous Postgres
+    ("0005", [("search",)]),
+    ("0006", [
+        ("index", "adresses", "ix_adresses_utilisateur_id"),
+        ("index", "commande_produit", "ix_commande_produit_produit_id"),
+        ("index", "produit_image", "ix_produit_image_image_id"),
+        ("index", "produit_options", "ix_produit_options_option_id"),
+        ("index", "commandes", "ix_commandes_date_commande"),
+        ("index", "commandes", "ix_commandes_utilisateur_date"),
+        ("index", "commandes", "ix_commandes_statut_date"),
+        ("index", "produits", "ix_produits_prix"),
+        ("index", "produits", "ix_produits_categorie"),
+        ("index", "produits", "ix_produits_categorie_prix"),
+        ("index", "produits", "ix_produits_hauteur"),
+        ("index", "produits", "ix_produits_largeur"),
+        ("index", "produits", "ix_produits_bois_id"),
+        ("index", "produits", "ix_produits_ral_id"),
+        ("index", "produits", "ix_produits_mis_en_avant"),
+        ("index", "produits", "ix_produits_meilleure_vente"),
+    ]),
+    ("0007", [
+        ("column", "utilisateurs", "token_version"), ("column", "utilisateurs", "date_revocation"),
+        ("index", "utilisateurs", "ix_utilisateurs_date_revocation"),
+    ]),
+]
+
+
+def get_config(connection=None) -> Config:
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    return config
+
+
+def detect_revision(connection) -> str:
+    """Dernière révision dont le schéma est entièrement présent (base sans alembic_version)."""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    columns: Dict[str, set] = {}
+    indexes: Dict[str, set] = {}
+
+    def exists(kind: str, *names: str) -> bool:
+        if kind == "table":
+            return names[0] in tables
+        if kind == "search":
+            if connection.dialect.name == "sqlite":
+                return "produits_fts" in tables
+            return exists("index", "produits", "ix_produits_recherche")
+        table, name = names
+        if table not in tables:
+            return False
+        if kind == "column":
+            if table not in columns:
+                columns[table] = {column["name"] for column in inspector.get_columns(table)}
+            return name in columns[table]
+        if table not in indexes:
+            indexes[table] = {index["name"] for index in inspector.get_indexes(table)}
+        return name in indexes[table]
+
+    revision = BASELINE
+    for candidate, objects in REVISION_OBJECTS:
+        if not all(exists(*obj) for obj in objects):
+            break
+        revision = candidate
+    return revision
+
+
+def run_migrations(revision: str = "head") -> None:
+    tables = set(inspect(engine).get_table_names())
+    # Connexion sans transaction ouverte : chaque migration gère la sienne (index concurrents)
+    with engine.connect() as connection:
+        config = get_config(connection)
+        if tables and "alembic_version" not in tables:
+            current = detect_revision(connection)
+            # Fin de la transaction de l'inspection : Alembic ouvre les siennes
+            connection.commit()
+            command.stamp(config, current)
+        command.upgrade(config, revision)
+
+
+if __name__ == "__main__":
+    run_migrations()
@@ -2,13 +2,14 @@ import enum
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import (Boolean, Column, DateTime, Enum, ForeignKey, Integer,
-                        String, Table, event)
+from sqlalchemy import (JSON, Boolean, Column, DateTime, Enum, ForeignKey,
+                        Index, Integer, String, Table, Text, event, inspect,
+                        text)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy_file import FileField
 
 from src.database import Base
-from src.tasks import get_password_hash
+from src.tasks import get_password_hash, is_password_hash
 
 
 class Gender(str, enum.Enum):
@@ -31,6 +32,12 @@ class StatutCommande(str, enum.Enum):
   LIVRE = "livre"
   ANNULE = "annule"
 
+class StatutTache(str, enum.Enum):
+  EN_ATTENTE = "en-attente"
+  EN_COURS = "en-cours"
+  TERMINEE = "terminee"
+  ECHEC = "echec"
+
 
 # Table d'association pour la relation many-to-many entre Commande et Produit
 commande_produit = Table(
@@ -38,6 +45,8 @@ commande_produit = Table(
     Base.metadata,
     Column("commande_id", Integer, ForeignKey("commandes.id"), primary_key=True),
     Column("produit_id", Integer, ForeignKey("produits.id"), primary_key=True),
+    # La clé primaire couvre commande -> produits, cet index produit -> commandes
+    Index("ix_commande_produit_produit_id", "produit_id"),
 )
 
 # Table d'association pour la relation many-to-many entre Produit et Image
@@ -46,6 +55,7 @@ produit_image = Table(
     Base.metadata,
     Column("produit_id", Integer, ForeignKey("produits.id"), primary_key=True),
     Column("image_id", Integer, ForeignKey("images.id"), primary_key=True),
+    Index("ix_produit_image_image_id", "image_id"),
 )
 
 class Utilisateur(Base):
@@ -61,23 +71,35 @@ class Utilisateur(Base):
     email: Mapped[str] = mapped_column(String(100), unique=True)
     mot_de_passe: Mapped[str] = mapped_column(String(255))
     date_creation: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Version des tokens d'accès : les tokens d'une version antérieure sont refusés
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    date_revocation: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True)
+
+    # token_version incrémenté en SQL : nouvelle valeur relue au flush (RETURNING, SELECT sous SQLite)
+    __mapper_args__ = {"eager_defaults": True}
 
     # Relations
     adresses: Mapped[List["Adresse"]] = relationship(back_populates="utilisateur", cascade="all, delete-orphan")
     commandes: Mapped[List["Commande"]] = relationship(back_populates="utilisateur", cascade="all, delete-orphan")
 
-# Événement qui s'exécute avant l'insertion d'un nouvel utilisateur
-@event.listens_for(Utilisateur, 'before_insert')
-def hash_password_before_insert(mapper, connection, target):
-    if target.mot_de_passe:  # Vérifie si un mot de passe est défini
-        target.mot_de_passe = get_password_hash(target.mot_de_passe)
-
-# Événement qui s'exécute avant la mise à jour d'un utilisateur
-@event.listens_for(Utilisateur, 'before_update')
-def hash_password_before_update(mapper, connection, target):
-    # Vérifie si le mot de passe a été modifié
-    if target.mot_de_passe and not target.mot_de_passe.startswith('$2b$'):  # Vérifie si le mot de passe n'est pas déjà haché
-        target.mot_de_passe = get_password_hash(target.mot_de_passe)
+# Hachage à l'affectation du mot de passe (constructeur, setattr, starlette-admin) plutôt
+# que dans le flush : aucun calcul bcrypt pendant que la transaction tient la connexion.
+# Les valeurs déjà hachées (ex: par le pool de hachage de src.tasks) sont conservées telles quelles.
+@event.listens_for(Utilisateur.mot_de_passe, 'set', retval=True)
+def hash_password_on_set(target, value, oldvalue, initiator):
+    if value and not is_password_hash(value):
+        return get_password_hash(value)
+    return value
+
+# Un changement de mot de passe (API, admin, scripts) révoque les tokens déjà émis ;
+# date_revocation permet aux workers de relire seulement les révocations récentes
+@event.listens_for(Utilisateur, "before_update")
+def revoke_tokens_on_password_change(mapper, connection, target):
+    if inspect(target).attrs.mot_de_passe.history.has_changes():
+        # Incrément en SQL, relu dans le flush (eager_defaults) : deux changements
+        # concurrents depuis la même version lue donnent bien deux versions
+        target.token_version = Utilisateur.token_version + 1
+        target.date_revocation = datetime.utcnow()
 
 class Adresse(Base):
     __tablename__ = "adresses"
@@ -90,7 +112,7 @@ class Adresse(Base):
     ville: Mapped[str] = mapped_column(String(100))
     code_postal: Mapped[str] = mapped_column(String(10))
     pays: Mapped[str] = mapped_column(String(100))
-    utilisateur_id: Mapped[int] = mapped_column(ForeignKey("utilisateurs.id"))
+    utilisateur_id: Mapped[int] = mapped_column(ForeignKey("utilisateurs.id"), index=True)
 
     # Relations
     utilisateur: Mapped["Utilisateur"] = relationship(back_populates="adresses")
@@ -108,6 +130,13 @@ class Commande(Base):
     utilisateur: Mapped["Utilisateur"] = relationship(back_populates="commandes")
     produits: Mapped[List["Produit"]] = relationship(secondary=commande_produit, back_populates="commandes")
 
+    # Index des filtres et tris des listes de commandes (clé de pagination en fin d'index)
+    __table_args__ = (
+        Index("ix_commandes_date_commande", "date_commande", "id"),
+        Index("ix_commandes_utilisateur_date", "utilisateur_id", "date_commande", "id"),
+        Index("ix_commandes_statut_date", "statut", "date_commande", "id"),
+    )
+
 class Produit(Base):
     __tablename__ = "produits"
 
@@ -144,12 +173,27 @@ class Produit(Base):
         back_populates="options"
     )
 
+    # Index des filtres et tris des listes de produits ; index partiels pour
+    # les produits mis en avant / meilleures ventes (peu nombreux)
+    __table_args__ = (
+        Index("ix_produits_prix", "prix", "id"),
+        Index("ix_produits_categorie", "categorie", "id"),
+        Index("ix_produits_categorie_prix", "categorie", "prix", "id"),
+        Index("ix_produits_hauteur", "hauteur"),
+        Index("ix_produits_largeur", "largeur"),
+        Index("ix_produits_bois_id", "bois_id"),
+        Index("ix_produits_ral_id", "ral_id"),
+        Index("ix_produits_mis_en_avant", "id", sqlite_where=text("mitEnAvant = 1"), postgresql_where=text('"mitEnAvant"')),
+        Index("ix_produits_meilleure_vente", "id", sqlite_where=text("meilleurVente = 1"), postgresql_where=text('"meilleurVente"')),
+    )
+
 # Table d'association pour les options de produits
 produit_options = Table(
     "produit_options",
     Base.metadata,
     Column("produit_id", Integer, ForeignKey("produits.id"), primary_key=True),
     Column("option_id", Integer, ForeignKey("produits.id"), primary_key=True),
+    Index("ix_produit_options_option_id", "option_id"),
 )
 
 class Bois(Base):
@@ -178,6 +222,32 @@ class Image(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     filename: Mapped[str] = mapped_column(String(255))
     file: Mapped[str] = mapped_column(FileField)
+    # SHA-256 du contenu : un même fichier n'est stocké qu'une fois
+    empreinte: Mapped[Optional[str]] = mapped_column(String(64), unique=True, index=True)
+    # Déclinaisons pré-générées et placeholder flou (renseignés par une tâche de fond)
+    variantes: Mapped[Optional[dict]] = mapped_column(JSON)
     
     # Relations
-    produits: Mapped[List["Produit"]] = relationship(secondary=produit_image, back_populates="images") 
\ No newline at end of file
+    produits: Mapped[List["Produit"]] = relationship(secondary=produit_image, back_populates="images") 
+
+# Compteur de version par namespace du catalogue, incrémenté à chaque écriture (ETag / Last-Modified)
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    nom: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    date_modification: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+# File de tâches de fond persistante : les tâches survivent aux redémarrages
+class Tache(Base):
+    __tablename__ = "taches"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    nom: Mapped[str] = mapped_column(String(100))
+    parametres: Mapped[dict] = mapped_column(JSON, default=dict)
+    statut: Mapped[StatutTache] = mapped_column(Enum(StatutTache, values_callable=lambda obj: [e.value for e in obj]), default=StatutTache.EN_ATTENTE, index=True)
+    tentatives: Mapped[int] = mapped_column(Integer, default=0)
+    erreur: Mapped[Optional[str]] = mapped_column(Text)
+    date_creation: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    date_execution: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    date_modification: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,205 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from src.config import (QUERY_PROFILER_MAX_SAMPLES,
+                        QUERY_PROFILER_N_PLUS_ONE_THRESHOLD,
+                        QUERY_PROFILER_RAISE, QUERY_PROFILER_SAMPLE_RATE,
+                        QUERY_SLOW_THRESHOLD)
+from src.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+# Littéraux et paramètres liés (?, %(nom)s, %s, $1, :nom ; pas les casts Postgres ::type)
+_VALUES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\?|%\(\w+\)s|%s|\$\d+|(?<!:):\w+")
+# Listes de paramètres de longueur variable : IN (?, ?, ?), VALUES (?, ?), (?, ?)
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+
+EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Forme normalisée d'une requête, sans valeurs : `WHERE id IN (1, 2)` et `WHERE id IN (?)` donnent la même."""
+    normalized = _VALUES.sub("?", _SPACES.sub(" ", statement).strip())
+    return _ROWS.sub("(?)", _LIST.sub("(?)", normalized))
+
+
+class NPlusOneError(Exception):
+    """Requête HTTP qui exécute la même requête SQL plus de N fois (mode QUERY_PROFILER_RAISE)."""
+
+
+class FingerprintStats:
+    __slots__ = ("count", "total", "durations")
+
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.total = 0.0
+        # Dernières durées seulement : le p95 suit le comportement récent
+        self.durations = deque(maxlen=max_samples)
+
+    def p95(self) -> float:
+        durations = sorted(self.durations)
+        return durations[int(0.95 * (len(durations) - 1))] if durations else 0.0
+
+
+class QueryProfiler:
+    """
+    Profilage des requêtes SQL par empreinte (requête sans ses valeurs) :
+    nombre, temps total et p95 sur les requêtes HTTP échantillonnées
+    (`sample_rate`), détection des N+1 (même empreinte exécutée plus de
+    `n_plus_one_threshold` fois dans une requête HTTP) et journal des
+    requêtes lentes avec leur plan d'exécution, échantillonnées ou non.
+
+    Hors échantillon, le coût par requête SQL se limite à une lecture du
+    contexte et une comparaison à `slow_threshold`.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = QUERY_PROFILER_SAMPLE_RATE,
+        n_plus_one_threshold: int = QUERY_PROFILER_N_PLUS_ONE_THRESHOLD,
+        slow_threshold: float = QUERY_SLOW_THRESHOLD,
+        raise_on_n_plus_one: bool = QUERY_PROFILER_RAISE,
+        max_samples: int = QUERY_PROFILER_MAX_SAMPLES,
+    ):
+        self.sample_rate = sample_rate
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_threshold = slow_threshold
+        self.raise_on_n_plus_one = raise_on_n_plus_one
+        self.max_samples = max_samples
+        self.stats: Dict[str, FingerprintStats] = {}
+        self._lock = threading.Lock()
+        # Empreintes de la requête HTTP en cours, si elle est échantillonnée
+        self._current: ContextVar[Optional[Counter]] = ContextVar("query_profile", default=None)
+
+    def instrument(self, engine) -> None:
+        """Profile les requêtes SQL d'un moteur (synchrone ou asynchrone)."""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._profiler_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("profiler_explain"):
+            return
+        elapsed = time.perf_counter() - context._profiler_start
+        if self.slow_threshold and elapsed >= self.slow_threshold:
+            self._log_slow(conn, statement, parameters, executemany, elapsed)
+
+        profile = self._current.get()
+        if profile is None:
+            return
+        key = fingerprint(statement)
+        profile[key] += 1
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = FingerprintStats(self.max_samples)
+            stats.count += 1
+            stats.total += elapsed
+            stats.durations.append(elapsed)
+
+    def _log_slow(self, conn, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+        plan = self.explain(conn, statement, parameters) if not executemany else None
+        logger.warning(
+            "Requête lente (%.0f ms) : %s\nPlan :\n%s",
+            elapsed * 1000, fingerprint(statement), "\n".join(plan) if plan else "(indisponible)",
+        )
+
+    @staticmethod
+    def explain(conn, statement: str, parameters) -> Optional[List[str]]:
+        """
+        Plan d'une requête de lecture, sur la même connexion (même transaction,
+        mêmes paramètres), dans un savepoint : sous Postgres, un EXPLAIN en
+        erreur interromprait sinon toute la transaction de la requête HTTP.
+        """
+        prefix = EXPLAIN.get(conn.dialect.name)
+        if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        # Ignoré par le profileur et par les métriques (src.metrics), savepoint compris
+        conn.info["profiler_explain"] = True
+        try:
+            with conn.begin_nested():
+                return [str(row[-1]) for row in conn.exec_driver_sql(prefix + statement, parameters)]
+        except Exception:
+            logger.debug("EXPLAIN impossible", exc_info=True)
+            return None
+        finally:
+            conn.info.pop("profiler_explain", None)
+
+    def start(self) -> Optional[Token]:
+        """Échantillonne la requête HTTP qui commence ; renvoie le jeton à passer à `finish`."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        return self._current.set(Counter())
+
+    def finish(self, token: Token, route: str, cause: Optional[BaseException] = None) -> None:
+        """
+        Termine la requête HTTP échantillonnée et signale un N+1. `cause` est
+        l'exception levée par l'application, s'il y en a une : elle devient la
+        cause de NPlusOneError ; une annulation (hors Exception) n'est pas
+        masquée, le N+1 est seulement journalisé.
+        """
+        profile = self._current.get()
+        self._current.reset(token)
+        repeated = {key: count for key, count in profile.items() if count > self.n_plus_one_threshold}
+        if not repeated:
+            return
+        details = "\n".join(f"  {count} x {key}" for key, count in repeated.items())
+        message = f"N+1 probable sur {route} :\n{details}"
+        if self.raise_on_n_plus_one and (cause is None or isinstance(cause, Exception)):
+            raise NPlusOneError(message) from cause
+        logger.warning(message)
+
+    def report(self, limit: int = 20) -> List[dict]:
+        """Empreintes les plus coûteuses (temps total décroissant)."""
+        with self._lock:
+            rows = [
+                {"requete": key, "nombre": stats.count, "total_ms": stats.total * 1000, "p95_ms": stats.p95() * 1000}
+                for key, stats in self.stats.items()
+            ]
+        return sorted(rows, key=lambda row: -row["total_ms"])[:limit]
+
+    def log_report(self, limit: int = 20) -> None:
+        rows = self.report(limit)
+        if rows:
+            logger.info("Requêtes SQL les plus coûteuses :\n%s", "\n".join(
+                f"  {row['nombre']:6} x  total {row['total_ms']:9.1f} ms  p95 {row['p95_ms']:7.2f} ms  {row['requete']}"
+                for row in rows
+            ))
+
+
+class QueryProfilerMiddleware:
+    """Middleware ASGI : délimite chaque requête HTTP pour le profileur (échantillonnage, N+1)."""
+
+    def __init__(self, app, profiler: "QueryProfiler"):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        token = self.profiler.start() if scope["type"] == "http" else None
+        if token is None:
+            return await self.app(scope, receive, send)
+        root_path = scope.get("root_path", "")
+        try:
+            await self.app(scope, receive, send)
+        except BaseException as exc:
+            self.profiler.finish(token, f"{scope['method']} {route_label(scope, root_path)}", exc)
+            raise
+        self.profiler.finish(token, f"{scope['method']} {route_label(scope, root_path)}")
+
+
+query_profiler = QueryProfiler()
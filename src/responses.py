@@ -0,0 +1,215 @@
+import inspect
+import os
+import re
+import stat
+from email.utils import parsedate_to_datetime
+from functools import lru_cache, wraps
+from typing import Any, Callable
+
+import anyio
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import FileResponse, ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+# Réponse par défaut de l'application : orjson au lieu du json de la stdlib
+FastJSONResponse = ORJSONResponse
+
+_SUB_RESPONSE = "_schema_route_response"
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """En-tête If-None-Match satisfait par `etag` (comparaison faible, RFC 9110 : W/"x" correspond à "x")."""
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@lru_cache(maxsize=None)
+def get_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_json(schema, value: Any) -> bytes:
+    """Valide `value` (objets ORM acceptés) avec `schema` et sérialise directement en bytes."""
+    adapter = get_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+class SchemaRoute(APIRoute):
+    """
+    Route dont la réponse est sérialisée par pydantic-core directement depuis
+    le `response_model` vers des bytes, sans l'arbre de dicts intermédiaire
+    produit par FastAPI (dump_python puis json.dumps).
+
+    Les en-têtes et le status posés sur le `Response` injecté (ex: ETag par
+    ConditionalGet) sont reportés sur la réponse finale, comme le fait FastAPI.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        response_model = kwargs.get("response_model")
+        if (
+            response_model is not None
+            and not isinstance(response_model, DefaultPlaceholder)
+            and inspect.iscoroutinefunction(endpoint)
+            # include_router recrée les routes à partir de l'endpoint déjà enveloppé
+            and not hasattr(endpoint, _SUB_RESPONSE)
+        ):
+            endpoint = self._wrap(endpoint, response_model, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _wrap(endpoint: Callable[..., Any], response_model, status_code: int) -> Callable[..., Any]:
+        signature = inspect.signature(endpoint)
+        # FastAPI n'injecte qu'un seul Response : on réutilise celui de l'endpoint s'il en déclare un
+        declared = next((
+            name for name, parameter in signature.parameters.items()
+            if inspect.isclass(parameter.annotation) and issubclass(parameter.annotation, Response)
+        ), None)
+
+        @wraps(endpoint)
+        async def wrapped(*args, **kwargs):
+            sub_response: Response = kwargs[declared] if declared else kwargs.pop(_SUB_RESPONSE)
+            content = await endpoint(*args, **kwargs)
+            if isinstance(content, Response):
+                return content
+            response = Response(
+                content=dump_json(response_model, content),
+                status_code=sub_response.status_code or status_code,
+                media_type="application/json",
+            )
+            response.headers.raw.extend(sub_response.headers.raw)
+            return response
+
+        setattr(wrapped, _SUB_RESPONSE, True)
+        if declared is None:
+            wrapped.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(_SUB_RESPONSE, inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+            ])
+        return wrapped
+
+
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse qui gère les requêtes conditionnelles (If-None-Match /
+    If-Modified-Since -> 304) et les requêtes `Range` sur un seul intervalle
+    (206 / 416, `If-Range`).
+
+    Le corps est envoyé sans lecture en Python quand le serveur le permet :
+    extension ASGI `http.response.zerocopy` (sendfile sur le descripteur) ou
+    `http.response.pathsend` pour un fichier complet. Sinon, lecture par blocs
+    dans un thread comme FileResponse.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        stat_result = self.stat_result
+        if stat_result is None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.set_stat_headers(stat_result)
+        self.headers["accept-ranges"] = "bytes"
+
+        request_headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        size = stat_result.st_size
+        start, end = 0, size - 1
+
+        if self._not_modified(request_headers):
+            self.status_code = 304
+            for header in ("content-length", "content-type", "content-disposition"):
+                if header in self.headers:
+                    del self.headers[header]
+            await send({"type": "http.response.start", "status": 304, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        requested = self._requested_range(request_headers, size)
+        if requested is False:
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{size}"
+            self.headers["content-length"] = "0"
+            await send({"type": "http.response.start", "status": 416, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if requested is not None:
+            start, end = requested
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        extensions = scope.get("extensions") or {}
+        count = end - start + 1
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopy" in extensions:
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopy", "file": file, "offset": start, "count": count})
+        elif "http.response.pathsend" in extensions and requested is None:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+    def _not_modified(self, request_headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, self.headers["etag"])
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(self.headers["last-modified"]) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _requested_range(self, request_headers, size: int):
+        """
+        Intervalle demandé `(début, fin)` inclus, None pour le fichier entier
+        (pas de Range, plusieurs intervalles, If-Range périmé ou en-tête
+        invalide, ignorés comme le permet la RFC 9110), False si insatisfiable.
+        """
+        header = request_headers.get("range")
+        if header is None:
+            return None
+        if_range = request_headers.get("if-range")
+        if if_range is not None and if_range.strip() not in (self.headers["etag"], self.headers["last-modified"]):
+            return None
+        match = _RANGE.match(header.strip())
+        if match is None:
+            return None
+        first, last = match.groups()
+        if not first:
+            if not last:
+                return None
+            # Suffixe : les N derniers octets
+            length = int(last)
+            if length == 0:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            return False
+        return start, end
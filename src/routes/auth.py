@@ -1,27 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.dependencies import get_db
+from src.dependencies import get_async_db
+from src.responses import SchemaRoute
 from src.schemas.auth import (LoginRequest, RegisterRequest,
                               ResetPasswordRequest)
 from src.schemas.token import Token
 from src.services.auth import AuthService
 
-router = APIRouter(tags=["Authentification"])
+router = APIRouter(tags=["Authentification"], route_class=SchemaRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 @router.post("/register", response_model=Token)
-def register(user_data: RegisterRequest, db: Session = Depends(get_db)):
+async def register(user_data: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     """Inscription d'un nouvel utilisateur"""
-    user = AuthService.register_user(db, user_data)
+    user = await AuthService.register_user(db, user_data)
     return AuthService.create_user_token(user)
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Connexion d'un utilisateur"""
-    user = AuthService.authenticate_user(db, login_data.email, login_data.mot_de_passe)
+    user = await AuthService.authenticate_user(db, login_data.email, login_data.mot_de_passe)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,12 +32,12 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     return AuthService.create_user_token(user)
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtention du token d'accès"""
-    user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+    user = await AuthService.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,10 +47,10 @@ def login_for_access_token(
     return AuthService.create_user_token(user)
 
 @router.post("/reset-password", response_model=dict)
-def reset_password(reset_data: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(reset_data: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """Réinitialiser le mot de passe d'un utilisateur"""
     try:
-        AuthService.reset_password(db, reset_data)
+        await AuthService.reset_password(db, reset_data)
         return {
             "message": "Mot de passe modifié avec succès",
             "status": "success"
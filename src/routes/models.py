@@ -1,144 +1,358 @@
-from typing import List
+import os
+from functools import partial
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Request,
+                     Response)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy_file.storage import StorageManager
 
-from src.dependencies import get_db
-from src.schemas.models import (RAL, Adresse, Bois, Commande, Image, Produit,
-                                Utilisateur)
-from src.services.models import (AdresseService, BoisService, CommandeService,
-                                 ImageService, ProduitService, RALService,
-                                 UtilisateurService)
+from src.config import (COMMANDE_BATCH_MAX_SIZE, PAGINATION_DEFAULT_LIMIT,
+                        PAGINATION_MAX_LIMIT, RENDITION_DEFAULT_QUALITY,
+                        RENDITION_MAX_SIZE)
+from src.dependencies import get_async_db, get_current_user
+from src.responses import RangeFileResponse, SchemaRoute
+from src.models.models import Categorie
+from src.schemas.filters import (CommandeFiltres, ProduitFiltres, TriCommande,
+                                 TriProduit)
+from src.schemas.models import (RAL, Adresse, Bois, Commande, CommandeCreate,
+                                Image, Produit, Utilisateur)
+from src.schemas.pagination import Page
+from src.schemas.search import RechercheProduits
+from src.services import models as sync_services
+from src.services.async_models import (AdresseService, BoisService,
+                                       CommandeService, ImageService,
+                                       ProduitService, RALService,
+                                       UtilisateurService)
+from src.services.export import ndjson_response, wants_ndjson
+from src.services.file import get_local_path, receive_upload
+from src.services.principals import Principal
+from src.services.renditions import (RenditionFormat, RenditionSpec,
+                                     rendition_service)
+from src.services.response_cache import response_cache
+from src.services.versions import ConditionalGet
 
-router = APIRouter()
+router = APIRouter(route_class=SchemaRoute)
+
+# Politiques Cache-Control des routes du catalogue : les clients gardent la
+# réponse `max-age` secondes puis revalident (ETag / Last-Modified -> 304)
+CACHE_CONTROL = {
+    "bois": "public, max-age=300, must-revalidate",
+    "rals": "public, max-age=300, must-revalidate",
+    "produits": "public, max-age=60, must-revalidate",
+}
+bois_validators = ConditionalGet("bois", CACHE_CONTROL["bois"])
+rals_validators = ConditionalGet("rals", CACHE_CONTROL["rals"])
+produits_validators = ConditionalGet("produits", CACHE_CONTROL["produits"])
+# Fichiers et déclinaisons : le contenu derrière une URL ne change jamais
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 # Routes pour les images
-@router.get("/images/", response_model=List[Image], tags=["Images"])
-def get_images(db: Session = Depends(get_db)):
+@router.get("/images/", response_model=Page[Image], tags=["Images"])
+async def get_images(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Récupérer toutes les images"""
-    return ImageService.get_all(db)
+    return await response_cache.get_or_set(
+        "images", request, Page[Image], lambda: ImageService.get_page(db, cursor, limit)
+    )
 
 @router.get("/images/{image_id}", response_model=Image, tags=["Images"])
-def get_image(image_id: int, db: Session = Depends(get_db)):
+async def get_image(image_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Récupérer une image par son ID"""
-    image = ImageService.get_by_id(db, image_id)
+    image = await response_cache.get_or_set(
+        "images", request, Image, lambda: ImageService.get_by_id(db, image_id)
+    )
     if not image:
         raise HTTPException(status_code=404, detail="Image non trouvée")
     return image
 
+@router.post(
+    "/images/",
+    response_model=Image,
+    status_code=201,
+    tags=["Images"],
+    dependencies=[Depends(get_current_user)],
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}},
+    }}}}},
+)
+async def upload_image(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Uploader une image (reçue en flux, stockée une seule fois par contenu)"""
+    upload = await receive_upload(request)
+    try:
+        image, created = await ImageService.create_from_upload(db, upload)
+    finally:
+        os.unlink(upload.path)
+    if not created:
+        response.status_code = 200
+    return image
+
+@router.api_route("/images/{image_id}/file", methods=["GET", "HEAD"], response_class=RangeFileResponse, tags=["Images"])
+async def get_image_file(image_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Récupérer le fichier d'une image (Range, ETag, cache immuable)"""
+    image = await ImageService.get_by_id(db, image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    # Les fichiers sont identifiés par UUID et jamais réécrits
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{image.file["file_id"]}"'}
+    path = get_local_path(image.file)
+    if path is None:
+        stored_file = StorageManager.get_file(image.file["path"])
+        return StreamingResponse(stored_file.object.as_stream(), media_type=stored_file.content_type, headers=headers)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Fichier de l'image introuvable")
+    return RangeFileResponse(path, media_type=image.file["content_type"], headers=headers)
+
+
+@router.get("/images/{image_id}/rendition", response_class=RangeFileResponse, tags=["Images"])
+async def get_image_rendition(
+    image_id: int,
+    width: Optional[int] = Query(None, ge=1, le=RENDITION_MAX_SIZE),
+    height: Optional[int] = Query(None, ge=1, le=RENDITION_MAX_SIZE),
+    format: RenditionFormat = RenditionFormat.WEBP,
+    quality: int = Query(RENDITION_DEFAULT_QUALITY, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Récupérer une image redimensionnée (générée une fois puis servie depuis le cache disque)"""
+    image = await ImageService.get_by_id(db, image_id)
+    if not image:
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    path = await rendition_service.get(image.file["path"], RenditionSpec(width, height, format, quality))
+    return RangeFileResponse(path, media_type=format.media_type, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
 # Routes pour les bois
-@router.get("/bois/", response_model=List[Bois], tags=["Bois"])
-def get_all_bois(db: Session = Depends(get_db)):
+@router.get("/bois/", response_model=Page[Bois], tags=["Bois"])
+async def get_all_bois(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    validators: dict = Depends(bois_validators)
+):
     """Récupérer tous les types de bois"""
-    return BoisService.get_all(db)
+    return await response_cache.get_or_set(
+        "bois", request, Page[Bois], lambda: BoisService.get_page(db, cursor, limit), validators
+    )
 
 @router.get("/bois/{bois_id}", response_model=Bois, tags=["Bois"])
-def get_bois(bois_id: int, db: Session = Depends(get_db)):
+async def get_bois(
+    bois_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    validators: dict = Depends(bois_validators)
+):
     """Récupérer un type de bois par son ID"""
-    bois = BoisService.get_by_id(db, bois_id)
+    bois = await response_cache.get_or_set(
+        "bois", request, Bois, lambda: BoisService.get_by_id(db, bois_id), validators
+    )
     if not bois:
         raise HTTPException(status_code=404, detail="Type de bois non trouvé")
     return bois
 
 # Routes pour les RAL
-@router.get("/rals/", response_model=List[RAL], tags=["RAL"])
-def get_all_rals(db: Session = Depends(get_db)):
+@router.get("/rals/", response_model=Page[RAL], tags=["RAL"])
+async def get_all_rals(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    validators: dict = Depends(rals_validators)
+):
     """Récupérer tous les RAL"""
-    return RALService.get_all(db)
+    return await response_cache.get_or_set(
+        "rals", request, Page[RAL], lambda: RALService.get_page(db, cursor, limit), validators
+    )
 
 @router.get("/rals/{ral_id}", response_model=RAL, tags=["RAL"])
-def get_ral(ral_id: int, db: Session = Depends(get_db)):
+async def get_ral(
+    ral_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    validators: dict = Depends(rals_validators)
+):
     """Récupérer un RAL par son ID"""
-    ral = RALService.get_by_id(db, ral_id)
+    ral = await response_cache.get_or_set(
+        "rals", request, RAL, lambda: RALService.get_by_id(db, ral_id), validators
+    )
     if not ral:
         raise HTTPException(status_code=404, detail="RAL non trouvé")
     return ral
 
 # Routes pour les adresses
-@router.get("/adresses/", response_model=List[Adresse], tags=["Adresses"])
-def get_all_adresses(db: Session = Depends(get_db)):
+@router.get("/adresses/", response_model=Page[Adresse], tags=["Adresses"])
+async def get_all_adresses(
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Récupérer toutes les adresses"""
-    return AdresseService.get_all(db)
+    return await AdresseService.get_page(db, cursor, limit)
 
 @router.get("/adresses/{adresse_id}", response_model=Adresse, tags=["Adresses"])
-def get_adresse(adresse_id: int, db: Session = Depends(get_db)):
+async def get_adresse(adresse_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupérer une adresse par son ID"""
-    adresse = AdresseService.get_by_id(db, adresse_id)
+    adresse = await AdresseService.get_by_id(db, adresse_id)
     if not adresse:
         raise HTTPException(status_code=404, detail="Adresse non trouvée")
     return adresse
 
 @router.get("/utilisateurs/{utilisateur_id}/adresses", response_model=List[Adresse], tags=["Adresses"])
-def get_adresses_utilisateur(utilisateur_id: int, db: Session = Depends(get_db)):
+async def get_adresses_utilisateur(utilisateur_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupérer toutes les adresses d'un utilisateur"""
-    return AdresseService.get_by_utilisateur(db, utilisateur_id)
+    return await AdresseService.get_by_utilisateur(db, utilisateur_id)
 
 # Routes pour les produits
-@router.get("/produits/", response_model=List[Produit], tags=["Produits"])
-def get_all_produits(db: Session = Depends(get_db)):
-    """Récupérer tous les produits"""
-    return ProduitService.get_all(db)
+@router.get("/produits/", response_model=Page[Produit], dependencies=[Depends(produits_validators)], tags=["Produits"])
+async def get_all_produits(
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    tri: TriProduit = TriProduit.ID,
+    filtres: ProduitFiltres = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Récupérer tous les produits (filtrables, triés par id, prix, hauteur ou largeur)"""
+    return await ProduitService.get_page(db, cursor, limit, filtres=filtres, tri=tri.value)
 
-@router.get("/produits/{produit_id}", response_model=Produit, tags=["Produits"])
-def get_produit(produit_id: int, db: Session = Depends(get_db)):
-    """Récupérer un produit par son ID"""
-    produit = ProduitService.get_by_id(db, produit_id)
-    if not produit:
-        raise HTTPException(status_code=404, detail="Produit non trouvé")
-    return produit
-
-@router.get("/produits/categorie/{categorie}", response_model=List[Produit], tags=["Produits"])
-def get_produits_by_categorie(categorie: str, db: Session = Depends(get_db)):
+@router.get("/produits/categorie/{categorie}", response_model=List[Produit], dependencies=[Depends(produits_validators)], tags=["Produits"])
+async def get_produits_by_categorie(categorie: str, db: AsyncSession = Depends(get_async_db)):
     """Récupérer tous les produits d'une catégorie"""
-    return ProduitService.get_by_categorie(db, categorie)
+    return await ProduitService.get_by_categorie(db, categorie)
 
 @router.get("/produits/meilleurs-ventes", response_model=List[Produit], tags=["Produits"])
-def get_meilleurs_ventes(db: Session = Depends(get_db)):
+async def get_meilleurs_ventes(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    validators: dict = Depends(produits_validators)
+):
     """Récupérer les produits marqués comme meilleures ventes"""
-    return ProduitService.get_meilleurs_ventes(db)
+    return await response_cache.get_or_set(
+        "produits", request, List[Produit], lambda: ProduitService.get_meilleurs_ventes(db), validators
+    )
 
 @router.get("/produits/mis-en-avant", response_model=List[Produit], tags=["Produits"])
-def get_produits_mis_en_avant(db: Session = Depends(get_db)):
+async def get_produits_mis_en_avant(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    validators: dict = Depends(produits_validators)
+):
     """Récupérer les produits mis en avant"""
-    return ProduitService.get_mis_en_avant(db)
+    return await response_cache.get_or_set(
+        "produits", request, List[Produit], lambda: ProduitService.get_mis_en_avant(db), validators
+    )
+
+@router.get("/produits/search", response_model=RechercheProduits, dependencies=[Depends(produits_validators)], tags=["Produits"])
+async def search_produits(
+    q: Optional[str] = Query(None, max_length=200),
+    categorie: Optional[Categorie] = None,
+    bois_id: Optional[int] = None,
+    ral_id: Optional[int] = None,
+    prix_min: Optional[float] = Query(None, ge=0),
+    prix_max: Optional[float] = Query(None, ge=0),
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Rechercher des produits (texte intégral sur nom et description) avec les facettes des résultats"""
+    return await ProduitService.search(
+        db, q, categorie=categorie, bois_id=bois_id, ral_id=ral_id,
+        prix_min=prix_min, prix_max=prix_max, limit=limit, offset=offset,
+    )
+
+@router.get("/produits/{produit_id}", response_model=Produit, dependencies=[Depends(produits_validators)], tags=["Produits"])
+async def get_produit(produit_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Récupérer un produit par son ID"""
+    produit = await ProduitService.get_by_id(db, produit_id)
+    if not produit:
+        raise HTTPException(status_code=404, detail="Produit non trouvé")
+    return produit
 
 # Routes pour les commandes
-@router.get("/commandes/", response_model=List[Commande], tags=["Commandes"])
-def get_all_commandes(db: Session = Depends(get_db)):
-    """Récupérer toutes les commandes"""
-    return CommandeService.get_all(db)
+@router.get("/commandes/", response_model=Page[Commande], tags=["Commandes"])
+async def get_all_commandes(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    tri: TriCommande = TriCommande.DATE,
+    filtres: CommandeFiltres = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Récupérer toutes les commandes (filtrables par statut, utilisateur et dates)
+
+    Avec `Accept: application/x-ndjson`, la collection filtrée est exportée
+    en streaming (une ligne JSON par élément, sans pagination).
+    """
+    if wants_ndjson(request):
+        return ndjson_response(partial(sync_services.CommandeService.iter_all, filtres=filtres), Commande)
+    return await CommandeService.get_page(db, cursor, limit, filtres=filtres, tri=tri.value)
 
 @router.get("/commandes/{commande_id}", response_model=Commande, tags=["Commandes"])
-def get_commande(commande_id: int, db: Session = Depends(get_db)):
+async def get_commande(commande_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupérer une commande par son ID"""
-    commande = CommandeService.get_by_id(db, commande_id)
+    commande = await CommandeService.get_by_id(db, commande_id)
     if not commande:
         raise HTTPException(status_code=404, detail="Commande non trouvée")
     return commande
 
+@router.post("/commandes/", response_model=Commande, status_code=201, tags=["Commandes"])
+async def create_commande(
+    commande: CommandeCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Créer une commande pour l'utilisateur connecté"""
+    created = await CommandeService.create_many(db, [commande], current_user.id)
+    return created[0]
+
+@router.post("/commandes/batch", response_model=List[Commande], status_code=201, tags=["Commandes"])
+async def create_commandes(
+    commandes: List[CommandeCreate] = Body(min_length=1, max_length=COMMANDE_BATCH_MAX_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Créer plusieurs commandes de l'utilisateur connecté en une transaction (passage en caisse, import)"""
+    return await CommandeService.create_many(db, commandes, current_user.id)
+
 @router.get("/utilisateurs/{utilisateur_id}/commandes", response_model=List[Commande], tags=["Commandes"])
-def get_commandes_utilisateur(utilisateur_id: int, db: Session = Depends(get_db)):
+async def get_commandes_utilisateur(utilisateur_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupérer toutes les commandes d'un utilisateur"""
-    return CommandeService.get_by_utilisateur(db, utilisateur_id)
+    return await CommandeService.get_by_utilisateur(db, utilisateur_id)
 
 # Routes pour les utilisateurs
-@router.get("/utilisateurs/", response_model=List[Utilisateur], tags=["Utilisateurs"])
-def get_all_utilisateurs(db: Session = Depends(get_db)):
-    """Récupérer tous les utilisateurs"""
-    return UtilisateurService.get_all(db)
+@router.get("/utilisateurs/", response_model=Page[Utilisateur], tags=["Utilisateurs"])
+async def get_all_utilisateurs(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Récupérer tous les utilisateurs
+
+    Avec `Accept: application/x-ndjson`, la collection complète est exportée
+    en streaming (une ligne JSON par élément, sans pagination).
+    """
+    if wants_ndjson(request):
+        return ndjson_response(sync_services.UtilisateurService.iter_all, Utilisateur)
+    return await UtilisateurService.get_page(db, cursor, limit)
 
 @router.get("/utilisateurs/{utilisateur_id}", response_model=Utilisateur, tags=["Utilisateurs"])
-def get_utilisateur(utilisateur_id: int, db: Session = Depends(get_db)):
+async def get_utilisateur(utilisateur_id: int, db: AsyncSession = Depends(get_async_db)):
     """Récupérer un utilisateur par son ID"""
-    utilisateur = UtilisateurService.get_by_id(db, utilisateur_id)
+    utilisateur = await UtilisateurService.get_by_id(db, utilisateur_id)
     if not utilisateur:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     return utilisateur
 
 @router.get("/utilisateurs/email/{email}", response_model=Utilisateur, tags=["Utilisateurs"])
-def get_utilisateur_by_email(email: str, db: Session = Depends(get_db)):
+async def get_utilisateur_by_email(email: str, db: AsyncSession = Depends(get_async_db)):
     """Récupérer un utilisateur par son email"""
-    utilisateur = UtilisateurService.get_by_email(db, email)
+    utilisateur = await UtilisateurService.get_by_email(db, email)
     if not utilisateur:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     return utilisateur
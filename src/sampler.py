@@ -0,0 +1,190 @@
+import enum
+import linecache
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from src.config import (PROFILER_INTERVAL, PROFILER_OUTPUT_DIR,
+                        PROFILER_SIGNAL, PROFILER_SIGNAL_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+# Feuilles des threads qui attendent du travail (boucle d'événements, exécuteurs)
+IDLE_FRAMES = {
+    "selectors:EpollSelector.select", "selectors:PollSelector.select", "selectors:SelectSelector.select",
+    "selectors:KqueueSelector.select", "concurrent.futures.thread:_worker",
+}
+# Une attente sur un verrou n'est une attente de travail que sous la file d'un
+# pool de threads (anyio) ou des workers de tâches : ailleurs, l'attente d'une
+# connexion du pool SQLAlchemy par exemple, elle fait partie de la requête
+WAIT_FRAMES = {"threading:Condition.wait", "threading:Event.wait"}
+IDLE_WAITERS = {"queue:Queue.get", "service src.services.jobs:JobQueue._run"}
+# Exécution d'une requête SQL (sqlite3 / psycopg2 / asyncpg sont en C, sous ces frames)
+SQL_FRAMES = {
+    "sqlalchemy.engine.default:DefaultDialect.do_execute",
+    "sqlalchemy.engine.default:DefaultDialect.do_executemany",
+    "sqlalchemy.engine.default:DefaultDialect.do_execute_no_params",
+}
+# Le thread d'aiosqlite exécute les requêtes des sessions asynchrones sans frame
+# Python dédiée : il attend sur la ligne `tx.get()`, il exécute sur les autres
+AIOSQLITE_WORKER = "aiosqlite.core:_connection_worker_thread"
+# Préfixe des frames de l'application, pour les retrouver dans le flamegraph
+CATEGORIES = (("src.routes.", "route "), ("src.services.", "service "))
+
+
+class ProfileMode(str, enum.Enum):
+    WALL = "wall"
+    CPU = "cpu"
+
+
+class ProfilerBusy(Exception):
+    """Un profil est déjà en cours dans ce worker."""
+
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage de tout le processus (worker uvicorn) :
+    un thread relève les piles de tous les threads (`sys._current_frames`)
+    toutes les `interval` secondes, sans instrumenter le code. Le coût est
+    celui de ce thread, quelques dizaines de microsecondes par relevé.
+
+    - wall : toutes les piles sauf celles des threads en attente de travail
+      (attentes d'E/S et verrous compris)
+    - cpu : seulement les threads qui ont consommé du CPU depuis le relevé
+      précédent (horloge CPU par thread, Linux)
+
+    Le résultat est au format « piles repliées » (`frame;frame;frame nombre`)
+    de flamegraph.pl, speedscope ou inferno. Les frames des routes, des
+    services et de l'exécution SQL sont préfixées par `route`, `service` et `sql`.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._labels: Dict[object, str] = {}
+
+    def profile(self, seconds: float, mode: ProfileMode = ProfileMode.WALL, interval: Optional[float] = None) -> Counter:
+        """Échantillonne pendant `seconds` (bloquant : à appeler dans un thread)."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            return self._run(seconds, mode, interval or self.interval)
+        finally:
+            self._lock.release()
+
+    def _run(self, seconds: float, mode: ProfileMode, interval: float) -> Counter:
+        stacks: Counter = Counter()
+        cpu_times: Dict[int, float] = {}
+        current = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == current:
+                        continue
+                    # Relevé à chaque passage, pour que l'écart couvre un seul intervalle
+                    consumed = self._consumed_cpu(ident, cpu_times) if mode == ProfileMode.CPU else None
+                    stack = self._stack(frame)
+                    if stack[-1] == AIOSQLITE_WORKER:
+                        if "tx.get(" in linecache.getline(frame.f_code.co_filename, frame.f_lineno):
+                            continue
+                        stack = (*stack, "sql sqlite3 (aiosqlite)")
+                    elif self._idle(stack):
+                        continue
+                    # Horloge CPU indisponible : le mode cpu se comporte comme wall
+                    if consumed is False:
+                        continue
+                    stacks[(names.get(ident, f"thread-{ident}"), *stack)] += 1
+                time.sleep(interval)
+            return stacks
+        finally:
+            # Les objets code des libellés ne sont pas retenus entre deux profils
+            self._labels.clear()
+
+    @staticmethod
+    def _idle(stack: Tuple[str, ...]) -> bool:
+        if stack[-1] in IDLE_FRAMES:
+            return True
+        waiting = len(stack)
+        while waiting > 1 and stack[waiting - 1] in WAIT_FRAMES:
+            waiting -= 1
+        return waiting < len(stack) and stack[waiting - 1] in IDLE_WAITERS
+
+    @staticmethod
+    def _consumed_cpu(ident: int, cpu_times: Dict[int, float]) -> Optional[bool]:
+        """Le thread a-t-il consommé du CPU depuis le relevé précédent ? None si on ne peut pas le savoir."""
+        try:
+            now = time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError):
+            return None
+        previous = cpu_times.get(ident)
+        cpu_times[ident] = now
+        return previous is not None and now > previous
+
+    def _stack(self, frame) -> Tuple[str, ...]:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = self._label(code, frame.f_globals.get("__name__", "?"))
+            labels.append(label)
+            frame = frame.f_back
+        return tuple(reversed(labels))
+
+    @staticmethod
+    def _label(code, module: str) -> str:
+        label = f"{module}:{code.co_qualname}"
+        if label in SQL_FRAMES:
+            return f"sql {label}"
+        for prefix, category in CATEGORIES:
+            if module.startswith(prefix):
+                return category + label
+        return label
+
+    @staticmethod
+    def collapse(stacks: Counter) -> str:
+        """Piles repliées, une ligne par pile distincte."""
+        return "".join(f"{';'.join(frame.replace(';', ':') for frame in stack)} {count}\n" for stack, count in stacks.most_common())
+
+    def profile_to_file(self, seconds: float, mode: ProfileMode = ProfileMode.WALL, directory: str = PROFILER_OUTPUT_DIR) -> Optional[str]:
+        try:
+            stacks = self.profile(seconds, mode)
+        except ProfilerBusy:
+            logger.warning("Profil déjà en cours dans le worker %s", os.getpid())
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"profil-{os.getpid()}-{datetime.now():%Y%m%d-%H%M%S}-{mode.value}.folded")
+        with open(path, "w") as output:
+            output.write(self.collapse(stacks))
+        logger.warning("Profil de %s s (%s, %s relevés) écrit dans %s", seconds, mode.value, sum(stacks.values()), path)
+        return path
+
+    def install_signal_handler(self, signal_name: Optional[str] = PROFILER_SIGNAL, seconds: float = PROFILER_SIGNAL_SECONDS) -> bool:
+        """
+        `kill -USR2 <pid du worker>` : profil wall de `seconds` secondes écrit
+        dans PROFILER_OUTPUT_DIR. Uniquement depuis le thread principal.
+        """
+        signum = getattr(signal, signal_name, None) if signal_name else None
+        if signum is None:
+            return False
+
+        def start_profile(received, frame):
+            threading.Thread(target=self.profile_to_file, args=(seconds,), name="sampling-profiler", daemon=True).start()
+
+        try:
+            signal.signal(signum, start_profile)
+        except ValueError:
+            # Application servie hors du thread principal (TestClient)
+            return False
+        return True
+
+
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,40 @@
+import enum
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from src.models.models import Categorie, StatutCommande
+
+
+class TriProduit(str, enum.Enum):
+    ID = "id"
+    PRIX = "prix"
+    PRIX_DESC = "-prix"
+    HAUTEUR = "hauteur"
+    LARGEUR = "largeur"
+
+class TriCommande(str, enum.Enum):
+    DATE = "date"
+    DATE_DESC = "-date"
+
+
+# Filtres des listes (paramètres de requête, via Depends())
+class ProduitFiltres(BaseModel):
+    categorie: Optional[Categorie] = None
+    bois_id: Optional[int] = None
+    ral_id: Optional[int] = None
+    prix_min: Optional[float] = Field(None, ge=0)
+    prix_max: Optional[float] = Field(None, ge=0)
+    hauteur_min: Optional[float] = Field(None, ge=0)
+    hauteur_max: Optional[float] = Field(None, ge=0)
+    largeur_min: Optional[float] = Field(None, ge=0)
+    largeur_max: Optional[float] = Field(None, ge=0)
+    mitEnAvant: Optional[bool] = None
+    meilleurVente: Optional[bool] = None
+
+class CommandeFiltres(BaseModel):
+    statut: Optional[StatutCommande] = None
+    utilisateur_id: Optional[int] = None
+    date_min: Optional[datetime] = None
+    date_max: Optional[datetime] = None
@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.models.models import Categorie, Gender, StatutCommande
 
@@ -23,6 +23,8 @@ class ImageCreate(ImageBase):
 
 class Image(ImageBase):
     id: int
+    empreinte: Optional[str] = None
+    variantes: Optional[Dict[str, Any]] = None
 
     class Config:
         from_attributes = True
@@ -107,8 +109,10 @@ class Produit(ProduitBase):
 class CommandeBase(BaseModel):
     statut: StatutCommande
 
-class CommandeCreate(CommandeBase):
-    pass
+# Ni statut ni utilisateur : une commande est créée en attente pour l'utilisateur
+# connecté, les autres statuts sont posés par le back-office (admin)
+class CommandeCreate(BaseModel):
+    produit_ids: List[int] = Field(min_length=1)
 
 class Commande(CommandeBase):
     id: int
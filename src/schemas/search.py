@@ -0,0 +1,17 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.schemas.models import Produit
+
+
+class Facette(BaseModel):
+    valeur: str
+    libelle: Optional[str] = None
+    nombre: int
+
+
+class RechercheProduits(BaseModel):
+    items: List[Produit] = []
+    total: int = 0
+    facettes: Dict[str, List[Facette]] = {}
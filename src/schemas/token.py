@@ -1,4 +1,6 @@
 
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -7,4 +9,6 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    email: str = None
\ No newline at end of file
+    email: str = None
+    id: Optional[int] = None
+    version: int = 0
@@ -0,0 +1,160 @@
+from typing import List, Optional, Tuple
+
+import anyio
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import PAGINATION_DEFAULT_LIMIT
+from src.database import replica_read
+from src.models.models import (RAL, Adresse, Bois, Commande, Image, Produit,
+                               Utilisateur)
+from src.schemas.models import CommandeCreate
+from src.services import models as sync_services
+from src.services.file import StreamedUpload, upload_file_from_path
+from src.services.principals import Principal
+from src.services.search import SearchService
+from src.services.loaders import (BOIS_LOADER, COMMANDE_LOADER, PRODUIT_LOADER,
+                                  RAL_LOADER, UTILISATEUR_LOADER)
+
+# Versions asynchrones des services de src/services/models.py.
+# Les chargements d'arbres (pagination, graphe utilisateur) réutilisent
+# l'implémentation synchrone via AsyncSession.run_sync : les I/O restent
+# non bloquantes pour la boucle d'événements.
+
+
+class AsyncPaginatedService:
+    sync_service = None
+    model = None
+    loader = ()
+
+    @classmethod
+    async def get_page(
+        cls,
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = PAGINATION_DEFAULT_LIMIT,
+        **options,
+    ) -> dict:
+        return await db.run_sync(cls.sync_service.get_page, cursor, limit, **options)
+
+    @classmethod
+    @replica_read
+    async def get_by_id(cls, db: AsyncSession, object_id: int):
+        return await db.get(cls.model, object_id, options=cls.loader)
+
+    @classmethod
+    async def _all(cls, db: AsyncSession, *criteria) -> list:
+        result = await db.scalars(select(cls.model).options(*cls.loader).where(*criteria))
+        return list(result.all())
+
+class ImageService(AsyncPaginatedService):
+    sync_service = sync_services.ImageService
+    model = Image
+
+    @classmethod
+    async def get_by_empreinte(cls, db: AsyncSession, empreinte: str) -> Optional[Image]:
+        return await db.scalar(select(Image).where(Image.empreinte == empreinte))
+
+    @classmethod
+    async def create_from_upload(cls, db: AsyncSession, upload: StreamedUpload) -> Tuple[Image, bool]:
+        """
+        Crée l'image d'un upload reçu en flux, ou renvoie l'image existante
+        de même contenu. Le booléen indique si l'image a été créée.
+        """
+        image = await cls.get_by_empreinte(db, upload.empreinte)
+        if image is not None:
+            return image, False
+
+        # Copie par blocs vers le stockage, hors de la boucle d'événements
+        file = await anyio.to_thread.run_sync(upload_file_from_path, upload.path, upload.filename, upload.content_type)
+        image = Image(filename=upload.filename, file=file, empreinte=upload.empreinte)
+        db.add(image)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Upload concurrent du même contenu : sqlalchemy-file supprime notre copie au rollback
+            await db.rollback()
+            return await cls.get_by_empreinte(db, upload.empreinte), False
+        return image, True
+
+class BoisService(AsyncPaginatedService):
+    sync_service = sync_services.BoisService
+    model = Bois
+    loader = BOIS_LOADER
+
+class RALService(AsyncPaginatedService):
+    sync_service = sync_services.RALService
+    model = RAL
+    loader = RAL_LOADER
+
+class AdresseService(AsyncPaginatedService):
+    sync_service = sync_services.AdresseService
+    model = Adresse
+
+    @classmethod
+    @replica_read
+    async def get_by_utilisateur(cls, db: AsyncSession, utilisateur_id: int) -> List[Adresse]:
+        return await cls._all(db, Adresse.utilisateur_id == utilisateur_id)
+
+class ProduitService(AsyncPaginatedService):
+    sync_service = sync_services.ProduitService
+    model = Produit
+    loader = PRODUIT_LOADER
+
+    @classmethod
+    @replica_read
+    async def get_by_categorie(cls, db: AsyncSession, categorie: str) -> List[Produit]:
+        return await cls._all(db, Produit.categorie == categorie)
+
+    @classmethod
+    @replica_read
+    async def get_meilleurs_ventes(cls, db: AsyncSession) -> List[Produit]:
+        return await cls._all(db, Produit.meilleurVente == True)
+
+    @classmethod
+    @replica_read
+    async def get_mis_en_avant(cls, db: AsyncSession) -> List[Produit]:
+        return await cls._all(db, Produit.mitEnAvant == True)
+
+    @classmethod
+    @replica_read
+    async def search(cls, db: AsyncSession, q: Optional[str] = None, **filters) -> dict:
+        return await db.run_sync(SearchService.search, q, **filters)
+
+class CommandeService(AsyncPaginatedService):
+    sync_service = sync_services.CommandeService
+    model = Commande
+    loader = COMMANDE_LOADER
+
+    @classmethod
+    @replica_read
+    async def get_by_utilisateur(cls, db: AsyncSession, utilisateur_id: int) -> List[Commande]:
+        return await cls._all(db, Commande.utilisateur_id == utilisateur_id)
+
+    @classmethod
+    async def create_many(cls, db: AsyncSession, commandes: List[CommandeCreate], utilisateur_id: int) -> List[dict]:
+        created = await db.run_sync(cls.sync_service.create_many, commandes, utilisateur_id)
+        await db.commit()
+        return created
+
+class UtilisateurService(AsyncPaginatedService):
+    sync_service = sync_services.UtilisateurService
+    model = Utilisateur
+    loader = UTILISATEUR_LOADER
+
+    @classmethod
+    async def get_by_email(cls, db: AsyncSession, email: str) -> Optional[Utilisateur]:
+        result = await db.scalars(select(Utilisateur).options(*cls.loader).where(Utilisateur.email == email))
+        return result.first()
+
+    @staticmethod
+    async def get_principal(db: AsyncSession, utilisateur_id: int) -> Optional[Principal]:
+        """
+        Identité de l'utilisateur authentifié, colonnes seules et sans réplica :
+        une révocation ne doit pas y être lue en retard.
+        """
+        row = (await db.execute(
+            select(Utilisateur.id, Utilisateur.email, Utilisateur.token_version).where(Utilisateur.id == utilisateur_id)
+        )).first()
+        return Principal(*row) if row is not None else None
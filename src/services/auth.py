@@ -1,24 +1,30 @@
-from datetime import timedelta
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.models import Utilisateur
 from src.schemas.auth import (LoginRequest, RegisterRequest,
                               ResetPasswordRequest)
-from src.tasks import create_access_token, get_password_hash, verify_password
+from src.services.principals import principal_cache
+from src.services.tokens import TokenVerifier
+from src.tasks import get_password_hash_async, verify_password_async
 
 
 class AuthService:
+    # Le hachage bcrypt passe par le pool de processus de src.tasks ; la transaction
+    # de lecture est terminée avant, pour ne pas garder la connexion pendant le calcul.
+
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[Utilisateur]:
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[Utilisateur]:
         try:
-            user = db.query(Utilisateur).filter(Utilisateur.email == email).first()
+            user = await db.scalar(select(Utilisateur).where(Utilisateur.email == email))
+            await db.commit()
             if not user:
                 return None
             
-            if not verify_password(password, user.mot_de_passe):
+            if not await verify_password_async(password, user.mot_de_passe):
                 return None
             
             return user
@@ -27,16 +33,17 @@ class AuthService:
             return None
 
     @staticmethod
-    def register_user(db: Session, user_data: RegisterRequest) -> Utilisateur:
+    async def register_user(db: AsyncSession, user_data: RegisterRequest) -> Utilisateur:
         # Vérifier si l'email existe déjà
-        existing_user = db.query(Utilisateur).filter(Utilisateur.email == user_data.email).first()
+        existing_user = await db.scalar(select(Utilisateur.id).where(Utilisateur.email == user_data.email))
+        await db.commit()
         if existing_user:
             raise HTTPException(status_code=400, detail="Email déjà utilisé")
 
         # Créer le nouvel utilisateur
         db_user = Utilisateur(
             email=user_data.email,
-            mot_de_passe=user_data.mot_de_passe,  # Le hachage sera fait automatiquement
+            mot_de_passe=await get_password_hash_async(user_data.mot_de_passe),
             sexe=user_data.sexe,
             nom=user_data.nom,
             prenom=user_data.prenom,
@@ -46,29 +53,29 @@ class AuthService:
         )
 
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
 
     @staticmethod
     def create_user_token(user: Utilisateur) -> dict:
-        access_token = create_access_token(
-            data={"sub": user.email},
-            expires_delta=timedelta(minutes=300)
-        )
+        # Identifiant et version des tokens de l'utilisateur : un changement de mot de passe les révoque
+        access_token = TokenVerifier.issue(user)
         return {"access_token": access_token, "token_type": "bearer"}
 
     @staticmethod
-    def reset_password(db: Session, reset_data: ResetPasswordRequest) -> bool:
-        user = db.query(Utilisateur).filter(Utilisateur.email == reset_data.email).first()
+    async def reset_password(db: AsyncSession, reset_data: ResetPasswordRequest) -> bool:
+        user = await db.scalar(select(Utilisateur).where(Utilisateur.email == reset_data.email))
+        await db.commit()
         if not user:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
         # Vérifier l'ancien mot de passe
-        if not verify_password(reset_data.ancien_mot_de_passe, user.mot_de_passe):
+        if not await verify_password_async(reset_data.ancien_mot_de_passe, user.mot_de_passe):
             raise HTTPException(status_code=400, detail="Ancien mot de passe incorrect")
 
-        # Mettre à jour avec le nouveau mot de passe
-        user.mot_de_passe = get_password_hash(reset_data.nouveau_mot_de_passe)
-        db.commit()
-        return True 
\ No newline at end of file
+        # Mettre à jour avec le nouveau mot de passe (révoque les tokens existants, cf. token_version)
+        user.mot_de_passe = await get_password_hash_async(reset_data.nouveau_mot_de_passe)
+        await db.commit()
+        principal_cache.invalidate_user(user.email)
+        return True 
@@ -0,0 +1,50 @@
+from typing import Callable, Iterable, Iterator, Type
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from src.config import EXPORT_CHUNK_SIZE
+from src.database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Le client demande-t-il l'export en streaming (Accept: application/x-ndjson) ?"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def iter_ndjson(rows: Iterable, schema: Type[BaseModel], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Sérialise les lignes une par une et les envoie par paquets de `chunk_size`."""
+    lines = []
+    for row in rows:
+        item = row if isinstance(row, schema) else schema.model_validate(row)
+        lines.append(item.model_dump_json().encode() + b"\n")
+        if len(lines) >= chunk_size:
+            yield b"".join(lines)
+            lines = []
+    if lines:
+        yield b"".join(lines)
+
+
+def ndjson_response(
+    iter_all: Callable[[Session, int], Iterable],
+    schema: Type[BaseModel],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> StreamingResponse:
+    """
+    Réponse NDJSON en streaming.
+
+    La session de la requête est fermée avant l'envoi du corps, le générateur
+    ouvre donc sa propre session pour toute la durée du streaming.
+    """
+    def body() -> Iterator[bytes]:
+        db = SessionLocal()
+        try:
+            yield from iter_ndjson(iter_all(db, chunk_size), schema, chunk_size)
+        finally:
+            db.close()
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
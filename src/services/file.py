@@ -1,7 +1,26 @@
-from typing import BinaryIO, Optional, Union
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional, Union
 from uuid import uuid4
 
+import anyio
+from fastapi import HTTPException, Request
+from libcloud.storage.drivers.local import LocalStorageDriver
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
 from sqlalchemy_file import File
+from sqlalchemy_file.storage import StorageManager
+
+from src.config import UPLOAD_MAX_SIZE, UPLOAD_TMP_DIR
+
+# Signatures des formats d'image acceptés à l'upload
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
 
 
 def upload_file(
@@ -27,4 +46,181 @@ def upload_file(
         file_id=str(uuid4())
     )
     
-    return file 
\ No newline at end of file
+    return file 
+
+
+def upload_file_from_path(path: str, filename: str, content_type: str) -> File:
+    """
+    Enregistre dans le stockage par défaut un fichier déjà présent sur disque,
+    copié par blocs (jamais chargé entièrement en mémoire). Bloquant : à
+    appeler dans un thread depuis une route async.
+
+    Args:
+        path: Chemin du fichier à enregistrer
+        filename: Nom d'origine du fichier
+        content_type: Type MIME du fichier
+
+    Returns:
+        File: L'objet File déjà enregistré (non ré-uploadé au flush)
+    """
+    file = File(
+        content_path=path,
+        filename=filename,
+        content_type=content_type,
+        file_id=str(uuid4())
+    )
+    file.save_to_storage(StorageManager.get_default())
+    return file
+
+
+def get_local_path(file: File) -> Optional[str]:
+    """
+    Chemin sur disque d'un fichier stocké dans un conteneur local, sans appel
+    au driver libcloud.
+
+    Args:
+        file: Le fichier (valeur d'un FileField)
+
+    Returns:
+        str: Le chemin du fichier, None si le stockage n'est pas local
+    """
+    container = StorageManager.get(file["upload_storage"])
+    if not isinstance(container.driver, LocalStorageDriver):
+        return None
+    return os.path.join(container.driver.base_path, container.name, file["file_id"])
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Type MIME d'après les premiers octets du fichier, None si non reconnu."""
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "image/avif"
+    return None
+
+
+class StreamedUpload(NamedTuple):
+    path: str
+    filename: str
+    content_type: str
+    size: int
+    empreinte: str
+
+
+class _UploadSink:
+    """Fichier temporaire qui calcule taille et SHA-256 au fil de l'écriture."""
+
+    def __init__(self, filename: str, max_size: int):
+        os.makedirs(UPLOAD_TMP_DIR, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=UPLOAD_TMP_DIR, suffix=".part")
+        self.file = os.fdopen(fd, "wb")
+        self.filename = filename
+        self.max_size = max_size
+        self.size = 0
+        self.head = b""
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise HTTPException(status_code=413, detail=f"Fichier trop volumineux (max {self.max_size} octets)")
+        if len(self.head) < 16:
+            self.head += data[:16 - len(self.head)]
+        self.sha256.update(data)
+        self.file.write(data)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def discard(self) -> None:
+        self.file.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def receive_upload(request: Request, field: str = "file", max_size: int = UPLOAD_MAX_SIZE) -> StreamedUpload:
+    """
+    Reçoit le fichier `field` d'un corps multipart en flux : chaque bloc reçu
+    est écrit sur disque (dans un thread) en calculant taille et empreinte,
+    la mémoire utilisée ne dépend pas de la taille du fichier. Les fichiers
+    trop gros sont refusés dès l'en-tête Content-Length ou dès que la limite
+    est dépassée, sans lire la suite du corps.
+
+    Le fichier temporaire renvoyé est à supprimer par l'appelant.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_size + 16 * 1024:
+        raise HTTPException(status_code=413, detail=f"Fichier trop volumineux (max {max_size} octets)")
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=415, detail="Corps multipart/form-data attendu")
+
+    state = {"headers": {}, "header_name": b"", "header_value": b""}
+    pending = []
+    sinks = []
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["sink"] = None
+
+    def on_header_field(data, start, end):
+        state["header_name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_name"].lower()] = state["header_value"]
+        state["header_name"], state["header_value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("utf-8", "replace") == field and b"filename" in options and not sinks:
+            sink = _UploadSink(os.path.basename(options[b"filename"].decode("utf-8", "replace")), max_size)
+            sinks.append(sink)
+            state["sink"] = sink
+
+    def on_part_data(data, start, end):
+        if state["sink"] is not None:
+            pending.append(data[start:end])
+
+    def write_pending(sink: _UploadSink, chunks):
+        for chunk in chunks:
+            sink.write(chunk)
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    try:
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if pending:
+                    chunks = pending[:]
+                    pending.clear()
+                    await anyio.to_thread.run_sync(write_pending, sinks[0], chunks)
+            parser.finalize()
+        except MultipartParseError:
+            raise HTTPException(status_code=400, detail="Corps multipart invalide")
+
+        if not sinks or sinks[0].size == 0:
+            raise HTTPException(status_code=422, detail=f"Champ fichier '{field}' manquant ou vide")
+        sink = sinks[0]
+        sink.close()
+        detected = sniff_content_type(sink.head)
+        if detected is None:
+            raise HTTPException(status_code=415, detail="Format d'image non supporté")
+        return StreamedUpload(sink.path, sink.filename, detected, sink.size, sink.sha256.hexdigest())
+    except BaseException:
+        for sink in sinks:
+            sink.discard()
+        raise
@@ -0,0 +1,162 @@
+import logging
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, event, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from src.config import (JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL, JOB_STALE_AFTER,
+                        JOB_WORKERS)
+from src.database import SessionLocal
+from src.models.models import StatutTache, Tache
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    File de tâches de fond adossée à la table `taches`.
+
+    Une tâche est insérée dans la transaction de l'écriture qui la déclenche
+    (elle n'existe que si l'écriture est commitée) et les workers sont
+    réveillés après le commit. Les workers (threads du processus) réservent
+    les tâches par un UPDATE conditionnel, ce qui permet à plusieurs
+    processus uvicorn de partager la file. Une tâche restée `en-cours` plus
+    de JOB_STALE_AFTER secondes (processus arrêté) est reprise, jusqu'à
+    `max_attempts` tentatives, puis passe en échec.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL,
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.handlers: Dict[str, Callable[[dict], None]] = {}
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def task(self, nom: str):
+        """Enregistre la fonction décorée comme traitement des tâches `nom`."""
+        def register(handler: Callable[[dict], None]):
+            self.handlers[nom] = handler
+            return handler
+        return register
+
+    @staticmethod
+    def enqueue(session: Session, nom: str, parametres: dict) -> None:
+        """Ajoute une tâche dans la transaction en cours de `session` (utilisable pendant un flush)."""
+        now = datetime.utcnow()
+        session.connection().execute(insert(Tache).values(
+            nom=nom, parametres=parametres, statut=StatutTache.EN_ATTENTE, tentatives=0,
+            date_creation=now, date_execution=now, date_modification=now,
+        ))
+        session.info["taches_ajoutees"] = True
+
+    def notify(self) -> None:
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stopping.set()
+        self.notify()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except Exception:
+                logger.exception("Réservation d'une tâche impossible")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self._execute(*job)
+
+    def _claim(self) -> Optional[tuple]:
+        now = datetime.utcnow()
+        stale = and_(Tache.statut == StatutTache.EN_COURS, Tache.date_modification < now - timedelta(seconds=JOB_STALE_AFTER))
+        claimable = or_(
+            and_(Tache.statut == StatutTache.EN_ATTENTE, Tache.date_execution <= now),
+            and_(stale, Tache.tentatives < self.max_attempts),
+        )
+        # Reprises épuisées : la tâche a arrêté son worker à chaque tentative (mémoire, plantage d'une extension C)
+        exhausted = and_(stale, Tache.tentatives >= self.max_attempts)
+        with SessionLocal() as db:
+            candidates = db.scalars(
+                select(Tache.id)
+                .where(or_(claimable, exhausted), Tache.nom.in_(self.handlers))
+                .order_by(Tache.id)
+                .limit(self.workers)
+            ).all()
+            abandoned = False
+            for job_id in candidates:
+                # Un autre worker a pu réserver la tâche entre le SELECT et l'UPDATE
+                claimed = db.execute(
+                    update(Tache)
+                    .where(Tache.id == job_id, claimable)
+                    .values(statut=StatutTache.EN_COURS, tentatives=Tache.tentatives + 1, date_modification=now)
+                ).rowcount
+                if claimed:
+                    job = db.execute(select(Tache.id, Tache.nom, Tache.parametres, Tache.tentatives).where(Tache.id == job_id)).one()
+                    db.commit()
+                    return tuple(job)
+                if db.execute(
+                    update(Tache)
+                    .where(Tache.id == job_id, exhausted)
+                    .values(statut=StatutTache.ECHEC, erreur="Worker arrêté pendant chaque tentative", date_modification=now)
+                ).rowcount:
+                    logger.error("Tâche #%s abandonnée après %s tentatives interrompues", job_id, self.max_attempts)
+                    abandoned = True
+            if abandoned:
+                db.commit()
+            else:
+                db.rollback()
+        return None
+
+    def _execute(self, job_id: int, nom: str, parametres: dict, tentatives: int) -> None:
+        values = {"date_modification": datetime.utcnow()}
+        try:
+            self.handlers[nom](parametres)
+            values.update(statut=StatutTache.TERMINEE, erreur=None)
+        except Exception:
+            logger.exception("Échec de la tâche %s #%s (tentative %s)", nom, job_id, tentatives)
+            values["erreur"] = traceback.format_exc()
+            if tentatives >= self.max_attempts:
+                values["statut"] = StatutTache.ECHEC
+            else:
+                # Nouvel essai avec un délai exponentiel
+                values["statut"] = StatutTache.EN_ATTENTE
+                values["date_execution"] = datetime.utcnow() + timedelta(seconds=self.poll_interval * 2 ** tentatives)
+        with SessionLocal() as db:
+            db.execute(update(Tache).where(Tache.id == job_id).values(**values))
+            db.commit()
+
+
+job_queue = JobQueue()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers_after_commit(session):
+    if session.info.pop("taches_ajoutees", False):
+        job_queue.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("taches_ajoutees", None)
@@ -0,0 +1,120 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+
+from src.models.models import (RAL, Adresse, Bois, Commande, Produit,
+                               Utilisateur, commande_produit)
+from src.schemas.models import Adresse as AdresseSchema
+from src.schemas.models import Commande as CommandeSchema
+from src.schemas.models import Produit as ProduitSchema
+from src.schemas.models import Utilisateur as UtilisateurSchema
+
+# Stratégies de chargement alignées sur les schémas de réponse (src/schemas/models.py).
+# Les relations many-to-one sont jointes, les collections chargées par un IN groupé,
+# ainsi la sérialisation ne déclenche plus aucun lazy load.
+BOIS_LOADER = (joinedload(Bois.image),)
+RAL_LOADER = (joinedload(RAL.image),)
+PRODUIT_LOADER = (
+    joinedload(Produit.bois).joinedload(Bois.image),
+    joinedload(Produit.ral).joinedload(RAL.image),
+    selectinload(Produit.images),
+)
+COMMANDE_LOADER = (
+    selectinload(Commande.produits).options(*PRODUIT_LOADER),
+)
+UTILISATEUR_LOADER = (
+    selectinload(Utilisateur.adresses),
+    selectinload(Utilisateur.commandes).options(*COMMANDE_LOADER),
+)
+
+# Taille des lots : borne la mémoire et le nombre de paramètres des clauses IN
+BATCH_SIZE = 500
+
+
+def _chunks(ids: List[int], size: int = BATCH_SIZE) -> Iterator[List[int]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _columns(obj, schema, exclude: Iterable[str]) -> dict:
+    """Copie les champs scalaires d'un objet ORM sans toucher à ses relations."""
+    return {name: getattr(obj, name) for name in schema.model_fields if name not in exclude}
+
+
+class UtilisateurGraphLoader:
+    """
+    Construit le graphe Utilisateur -> adresses / commandes -> produits
+    par niveaux, avec une requête IN groupée par niveau et par lot.
+
+    Les produits partagés entre commandes ne sont chargés et sérialisés
+    qu'une seule fois pour toute la durée du chargement.
+    """
+
+    def __init__(self, db: Session, batch_size: int = BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.produits: Dict[int, ProduitSchema] = {}
+
+    def iter(self, query: Optional[Query] = None) -> Iterator[UtilisateurSchema]:
+        """Itère sur les utilisateurs de `query` (tous par défaut), lot par lot."""
+        query = query if query is not None else self.db.query(Utilisateur)
+        last_id = None
+        while True:
+            batch_query = query.order_by(Utilisateur.id)
+            if last_id is not None:
+                batch_query = batch_query.filter(Utilisateur.id > last_id)
+            utilisateurs = batch_query.limit(self.batch_size).all()
+            if not utilisateurs:
+                return
+            yield from self.build(utilisateurs)
+            last_id = utilisateurs[-1].id
+            if len(utilisateurs) < self.batch_size:
+                return
+
+    def load(self, query: Optional[Query] = None) -> List[UtilisateurSchema]:
+        return list(self.iter(query))
+
+    def build(self, utilisateurs: List[Utilisateur]) -> List[UtilisateurSchema]:
+        user_ids = [u.id for u in utilisateurs]
+
+        adresses: Dict[int, List[AdresseSchema]] = {uid: [] for uid in user_ids}
+        for adresse in self.db.query(Adresse).filter(Adresse.utilisateur_id.in_(user_ids)).order_by(Adresse.id):
+            adresses[adresse.utilisateur_id].append(AdresseSchema.model_validate(adresse))
+
+        commandes = self.db.query(Commande).filter(Commande.utilisateur_id.in_(user_ids)).order_by(Commande.id).all()
+        commande_ids = [c.id for c in commandes]
+
+        produits_par_commande: Dict[int, List[int]] = {cid: [] for cid in commande_ids}
+        for ids in _chunks(commande_ids, self.batch_size):
+            rows = self.db.execute(
+                select(commande_produit.c.commande_id, commande_produit.c.produit_id)
+                .where(commande_produit.c.commande_id.in_(ids))
+            )
+            for commande_id, produit_id in rows:
+                produits_par_commande[commande_id].append(produit_id)
+
+        self._load_produits({pid for pids in produits_par_commande.values() for pid in pids})
+
+        commandes_par_user: Dict[int, List[CommandeSchema]] = {uid: [] for uid in user_ids}
+        for commande in commandes:
+            commandes_par_user[commande.utilisateur_id].append(CommandeSchema(
+                **_columns(commande, CommandeSchema, exclude=("produits",)),
+                produits=[self.produits[pid] for pid in produits_par_commande[commande.id]],
+            ))
+
+        return [
+            UtilisateurSchema(
+                **_columns(u, UtilisateurSchema, exclude=("adresses", "commandes")),
+                adresses=adresses[u.id],
+                commandes=commandes_par_user[u.id],
+            )
+            for u in utilisateurs
+        ]
+
+    def _load_produits(self, produit_ids) -> None:
+        """Charge et sérialise les produits pas encore vus (dédupliqués par ID)."""
+        missing = sorted(pid for pid in produit_ids if pid not in self.produits)
+        for ids in _chunks(missing, self.batch_size):
+            for produit in self.db.query(Produit).options(*PRODUIT_LOADER).filter(Produit.id.in_(ids)):
+                self.produits[produit.id] = ProduitSchema.model_validate(produit)
@@ -1,94 +1,247 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterator, List, Optional
 
+from fastapi import HTTPException
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
+from src.config import EXPORT_CHUNK_SIZE, PAGINATION_DEFAULT_LIMIT
+from src.database import replica_read
 from src.models.models import (RAL, Adresse, Bois, Commande, Image, Produit,
-                               Utilisateur)
+                               StatutCommande, Utilisateur, commande_produit)
+from src.schemas.filters import CommandeFiltres, ProduitFiltres
+from src.schemas.models import CommandeCreate
+from src.schemas.models import Utilisateur as UtilisateurSchema
+from src.services.loaders import (BOIS_LOADER, COMMANDE_LOADER, PRODUIT_LOADER,
+                                  RAL_LOADER, UTILISATEUR_LOADER,
+                                  UtilisateurGraphLoader)
+from src.services.pagination import PaginatedService, paginate
 
 
-class ImageService:
+class ImageService(PaginatedService):
+    model = Image
+
     @staticmethod
+    @replica_read
     def get_all(db: Session) -> List[Image]:
         return db.query(Image).all()
 
     @staticmethod
+    @replica_read
     def get_by_id(db: Session, image_id: int) -> Optional[Image]:
         return db.query(Image).filter(Image.id == image_id).first()
 
-class BoisService:
+class BoisService(PaginatedService):
+    model = Bois
+    loader = BOIS_LOADER
+
     @staticmethod
+    @replica_read
     def get_all(db: Session) -> List[Bois]:
-        return db.query(Bois).all()
+        return db.query(Bois).options(*BOIS_LOADER).all()
 
     @staticmethod
+    @replica_read
     def get_by_id(db: Session, bois_id: int) -> Optional[Bois]:
-        return db.query(Bois).filter(Bois.id == bois_id).first()
+        return db.query(Bois).options(*BOIS_LOADER).filter(Bois.id == bois_id).first()
+
+class RALService(PaginatedService):
+    model = RAL
+    loader = RAL_LOADER
 
-class RALService:
     @staticmethod
+    @replica_read
     def get_all(db: Session) -> List[RAL]:
-        return db.query(RAL).all()
+        return db.query(RAL).options(*RAL_LOADER).all()
 
     @staticmethod
+    @replica_read
     def get_by_id(db: Session, ral_id: int) -> Optional[RAL]:
-        return db.query(RAL).filter(RAL.id == ral_id).first()
+        return db.query(RAL).options(*RAL_LOADER).filter(RAL.id == ral_id).first()
+
+class AdresseService(PaginatedService):
+    model = Adresse
 
-class AdresseService:
     @staticmethod
+    @replica_read
     def get_all(db: Session) -> List[Adresse]:
         return db.query(Adresse).all()
 
     @staticmethod
+    @replica_read
     def get_by_id(db: Session, adresse_id: int) -> Optional[Adresse]:
         return db.query(Adresse).filter(Adresse.id == adresse_id).first()
 
     @staticmethod
+    @replica_read
     def get_by_utilisateur(db: Session, utilisateur_id: int) -> List[Adresse]:
         return db.query(Adresse).filter(Adresse.utilisateur_id == utilisateur_id).all()
 
-class ProduitService:
-    @staticmethod
+class ProduitService(PaginatedService):
+    model = Produit
+    loader = PRODUIT_LOADER
+    sort_columns = {"id": None, "prix": Produit.prix, "hauteur": Produit.hauteur, "largeur": Produit.largeur}
+
+    @staticmethod
+    def filter_criteria(filtres: ProduitFiltres) -> List:
+        criteria = []
+        for value, criterion in (
+            (filtres.categorie, lambda v: Produit.categorie == v),
+            (filtres.bois_id, lambda v: Produit.bois_id == v),
+            (filtres.ral_id, lambda v: Produit.ral_id == v),
+            (filtres.prix_min, lambda v: Produit.prix >= v),
+            (filtres.prix_max, lambda v: Produit.prix <= v),
+            (filtres.hauteur_min, lambda v: Produit.hauteur >= v),
+            (filtres.hauteur_max, lambda v: Produit.hauteur <= v),
+            (filtres.largeur_min, lambda v: Produit.largeur >= v),
+            (filtres.largeur_max, lambda v: Produit.largeur <= v),
+            # Les booléens sont rendus littéralement (= 1) : SQLite peut utiliser les index partiels
+            (filtres.mitEnAvant, lambda v: Produit.mitEnAvant == v),
+            (filtres.meilleurVente, lambda v: Produit.meilleurVente == v),
+        ):
+            if value is not None:
+                criteria.append(criterion(value))
+        return criteria
+
+    @staticmethod
+    @replica_read
     def get_all(db: Session) -> List[Produit]:
-        return db.query(Produit).all()
+        return db.query(Produit).options(*PRODUIT_LOADER).all()
 
     @staticmethod
+    @replica_read
     def get_by_id(db: Session, produit_id: int) -> Optional[Produit]:
-        return db.query(Produit).filter(Produit.id == produit_id).first()
+        return db.query(Produit).options(*PRODUIT_LOADER).filter(Produit.id == produit_id).first()
 
     @staticmethod
+    @replica_read
     def get_by_categorie(db: Session, categorie: str) -> List[Produit]:
-        return db.query(Produit).filter(Produit.categorie == categorie).all()
+        return db.query(Produit).options(*PRODUIT_LOADER).filter(Produit.categorie == categorie).all()
 
     @staticmethod
+    @replica_read
     def get_meilleurs_ventes(db: Session) -> List[Produit]:
-        return db.query(Produit).filter(Produit.meilleurVente == True).all()
+        return db.query(Produit).options(*PRODUIT_LOADER).filter(Produit.meilleurVente == True).all()
 
     @staticmethod
+    @replica_read
     def get_mis_en_avant(db: Session) -> List[Produit]:
-        return db.query(Produit).filter(Produit.mitEnAvant == True).all()
+        return db.query(Produit).options(*PRODUIT_LOADER).filter(Produit.mitEnAvant == True).all()
 
-class CommandeService:
-    @staticmethod
-    def get_all(db: Session) -> List[Commande]:
-        return db.query(Commande).all()
+class CommandeService(PaginatedService):
+    model = Commande
+    loader = COMMANDE_LOADER
+    sort_column = Commande.date_commande
+    sort_columns = {"date": Commande.date_commande}
 
     @staticmethod
-    def get_by_id(db: Session, commande_id: int) -> Optional[Commande]:
-        return db.query(Commande).filter(Commande.id == commande_id).first()
+    def filter_criteria(filtres: CommandeFiltres) -> List:
+        criteria = []
+        if filtres.statut is not None:
+            criteria.append(Commande.statut == filtres.statut)
+        if filtres.utilisateur_id is not None:
+            criteria.append(Commande.utilisateur_id == filtres.utilisateur_id)
+        if filtres.date_min is not None:
+            criteria.append(Commande.date_commande >= filtres.date_min)
+        if filtres.date_max is not None:
+            criteria.append(Commande.date_commande <= filtres.date_max)
+        return criteria
 
     @staticmethod
-    def get_by_utilisateur(db: Session, utilisateur_id: int) -> List[Commande]:
-        return db.query(Commande).filter(Commande.utilisateur_id == utilisateur_id).all()
+    @replica_read
+    def get_all(db: Session) -> List[Commande]:
+        return db.query(Commande).options(*COMMANDE_LOADER).all()
 
-class UtilisateurService:
     @staticmethod
-    def get_all(db: Session) -> List[Utilisateur]:
-        return db.query(Utilisateur).all()
+    @replica_read
+    def get_by_id(db: Session, commande_id: int) -> Optional[Commande]:
+        return db.query(Commande).options(*COMMANDE_LOADER).filter(Commande.id == commande_id).first()
+
+    @classmethod
+    def iter_all(cls, db: Session, chunk_size: int = EXPORT_CHUNK_SIZE, filtres: Optional[CommandeFiltres] = None) -> Iterator[Commande]:
+        query = db.query(Commande).options(*COMMANDE_LOADER)
+        if filtres is not None:
+            query = query.filter(*cls.filter_criteria(filtres))
+        return query.order_by(Commande.id).yield_per(chunk_size)
 
     @staticmethod
+    @replica_read
+    def get_by_utilisateur(db: Session, utilisateur_id: int) -> List[Commande]:
+        return db.query(Commande).options(*COMMANDE_LOADER).filter(Commande.utilisateur_id == utilisateur_id).all()
+
+    @staticmethod
+    def create_many(db: Session, commandes: List[CommandeCreate], utilisateur_id: int) -> List[dict]:
+        """
+        Crée des commandes en attente de l'utilisateur `utilisateur_id` et leurs lignes `commande_produit` par insertions
+        groupées (INSERT multi-lignes / executemany), dans la transaction en
+        cours : le commit revient à l'appelant. Les produits sont validés et
+        chargés en une requête IN ; les commandes sont renvoyées telles
+        qu'insérées, sans les relire.
+        """
+        produit_ids = {produit_id for commande in commandes for produit_id in commande.produit_ids}
+        produits = {
+            produit.id: produit
+            for produit in db.scalars(select(Produit).options(*PRODUIT_LOADER).where(Produit.id.in_(produit_ids)))
+        }
+        unknown = sorted(produit_ids - produits.keys())
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Produits inexistants : {unknown}")
+
+        now = datetime.utcnow()
+        rows = [
+            {"statut": StatutCommande.EN_ATTENTE, "utilisateur_id": utilisateur_id, "date_commande": now}
+            for commande in commandes
+        ]
+        if db.get_bind().dialect.name == "sqlite":
+            # Un seul INSERT multi-lignes, dont SQLite attribue les identifiants dans l'ordre
+            # des lignes ; sort_by_parameter_order y reviendrait à une ligne par requête.
+            ids = sorted(db.scalars(insert(Commande).returning(Commande.id), rows))
+        else:
+            # Ordre de RETURNING non garanti (plusieurs lots, Postgres) : SQLAlchemy le rétablit
+            ids = list(db.scalars(insert(Commande).returning(Commande.id, sort_by_parameter_order=True), rows))
+
+        lignes = [
+            {"commande_id": commande_id, "produit_id": produit_id}
+            for commande_id, commande in zip(ids, commandes)
+            # Un produit en double dans une commande n'y figure qu'une fois (clé primaire)
+            for produit_id in dict.fromkeys(commande.produit_ids)
+        ]
+        db.execute(insert(commande_produit), lignes)
+
+        return [
+            {**row, "id": commande_id, "produits": [produits[produit_id] for produit_id in dict.fromkeys(commande.produit_ids)]}
+            for commande_id, row, commande in zip(ids, rows, commandes)
+        ]
+
+class UtilisateurService(PaginatedService):
+    model = Utilisateur
+
+    @staticmethod
+    @replica_read
+    def get_all(db: Session) -> List[UtilisateurSchema]:
+        return UtilisateurGraphLoader(db).load()
+
+    @staticmethod
+    def iter_all(db: Session, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[UtilisateurSchema]:
+        return UtilisateurGraphLoader(db, batch_size=chunk_size).iter()
+
+    @classmethod
+    @replica_read
+    def get_page(
+        cls,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = PAGINATION_DEFAULT_LIMIT,
+    ) -> dict:
+        utilisateurs, next_cursor = paginate(db.query(Utilisateur), cls.sort_key(), cursor, limit)
+        return {"items": UtilisateurGraphLoader(db).build(utilisateurs), "next_cursor": next_cursor}
+
+    @staticmethod
+    @replica_read
     def get_by_id(db: Session, utilisateur_id: int) -> Optional[Utilisateur]:
-        return db.query(Utilisateur).filter(Utilisateur.id == utilisateur_id).first()
+        return db.query(Utilisateur).options(*UTILISATEUR_LOADER).filter(Utilisateur.id == utilisateur_id).first()
 
+    # Authentification : toujours sur le primaire (compte tout juste créé)
     @staticmethod
     def get_by_email(db: Session, email: str) -> Optional[Utilisateur]:
-        return db.query(Utilisateur).filter(Utilisateur.email == email).first() 
\ No newline at end of file
+        return db.query(Utilisateur).options(*UTILISATEUR_LOADER).filter(Utilisateur.email == email).first()
@@ -0,0 +1,124 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+
+from src.config import PAGINATION_DEFAULT_LIMIT, PAGINATION_MAX_LIMIT
+from src.database import replica_read
+
+
+def encode_cursor(values: List[Any], tri: Optional[str] = None) -> str:
+    """
+    Encode les valeurs de la clé de tri de la dernière ligne en curseur
+    opaque, avec le tri qui l'a produit : rejoué avec un autre tri, il est
+    refusé au lieu de comparer des valeurs d'une autre colonne.
+    """
+    payload = {
+        "tri": tri,
+        "cle": [v.isoformat() if isinstance(v, (date, datetime)) else getattr(v, "value", v) for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, columns, tri: Optional[str] = None) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["cle"]
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        values = [_from_json(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    if payload.get("tri") != tri:
+        raise HTTPException(status_code=400, detail="Curseur de pagination obtenu avec un autre tri")
+    return values
+
+
+def _from_json(column, value):
+    python_type = column.type.python_type
+    if value is not None and python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    return value
+
+
+def paginate(
+    query: Query,
+    columns: Tuple,
+    cursor: Optional[str] = None,
+    limit: int = PAGINATION_DEFAULT_LIMIT,
+    descending: bool = False,
+    tri: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Pagination par clé (keyset) : `columns` est la clé de tri, qui doit se
+    terminer par la clé primaire pour être unique. `descending` inverse le
+    sens de toute la clé (un index sur `columns` sert dans les deux sens).
+    `tri` est enregistré dans le curseur, qui n'est accepté qu'avec le même tri.
+
+    Returns:
+        Les lignes de la page et le curseur de la page suivante (None en fin de liste)
+    """
+    limit = max(1, min(limit, PAGINATION_MAX_LIMIT))
+    if cursor:
+        values = decode_cursor(cursor, columns, tri)
+        key = columns[0] if len(columns) == 1 else tuple_(*columns)
+        bound = values[0] if len(columns) == 1 else tuple_(*values)
+        query = query.filter(key < bound if descending else key > bound)
+
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    order = [column.desc() for column in columns] if descending else columns
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns], tri)
+
+
+class PaginatedService:
+    """
+    Base des services exposant une route de liste paginée.
+
+    Les sous-classes déclarent `model`, éventuellement `loader` (options de
+    chargement) et `sort_column` (sinon le tri se fait sur la clé primaire).
+    Les listes filtrables déclarent aussi `sort_columns` (tri demandé ->
+    colonne, préfixe "-" pour l'ordre décroissant) et `filter_criteria`.
+    """
+    model = None
+    loader: Tuple = ()
+    sort_column = None
+    sort_columns: dict = {}
+
+    @classmethod
+    def sort_key(cls, tri: Optional[str] = None) -> Tuple:
+        column = cls.sort_columns[tri.lstrip("-")] if tri else cls.sort_column
+        if column is None:
+            return (cls.model.id,)
+        return (column, cls.model.id)
+
+    @classmethod
+    def filter_criteria(cls, filtres) -> List:
+        return []
+
+    @classmethod
+    @replica_read
+    def get_page(
+        cls,
+        db: Session,
+        cursor: Optional[str] = None,
+        limit: int = PAGINATION_DEFAULT_LIMIT,
+        filtres=None,
+        tri: Optional[str] = None,
+    ) -> dict:
+        query = db.query(cls.model).options(*cls.loader)
+        if filtres is not None:
+            query = query.filter(*cls.filter_criteria(filtres))
+        descending = bool(tri) and tri.startswith("-")
+        items, next_cursor = paginate(query, cls.sort_key(tri), cursor, limit, descending, tri)
+        return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,93 @@
+import threading
+from collections import defaultdict
+from typing import Dict, NamedTuple, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from src.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from src.models.models import Utilisateur
+from src.services.cache import TTLCache
+
+
+class Principal(NamedTuple):
+    """Utilisateur authentifié : son identité seulement, immuable et sans session."""
+    id: int
+    email: str
+    token_version: int
+
+
+class PrincipalCache:
+    """
+    Cache token -> utilisateur authentifié utilisé par `get_current_user`.
+
+    Les entrées sont des `Principal` (identité seulement) : rien n'est partagé
+    entre requêtes et threads qui puisse devenir obsolète ou déclencher un
+    chargement. Un index email -> tokens permet d'invalider tous les tokens
+    d'un utilisateur quand il est modifié.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self._tokens_by_email: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self._cache = TTLCache(maxsize, ttl, on_evict=self._forget_token)
+
+    def get(self, token: str) -> Optional[Principal]:
+        # Toujours ce verrou avant celui du TTLCache (l'éviction rappelle _forget_token)
+        with self._lock:
+            return self._cache.get(token)
+
+    def set(self, token: str, principal: Principal, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._cache.set(token, principal, ttl)
+            self._tokens_by_email[principal.email].add(token)
+
+    def invalidate_user(self, email: str) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_email.pop(email, ())):
+                self._cache.delete(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._tokens_by_email.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._cache.stats()
+
+    def _forget_token(self, token: str, principal: Principal) -> None:
+        with self._lock:
+            tokens = self._tokens_by_email.get(principal.email)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_email[principal.email]
+
+
+principal_cache = PrincipalCache()
+
+
+# Toute modification d'un utilisateur (API, admin, scripts) invalide ses tokens en cache
+@event.listens_for(Utilisateur, "after_update")
+@event.listens_for(Utilisateur, "after_delete")
+def invalidate_principal(mapper, connection, target):
+    emails = {target.email, *(inspect(target).attrs.email.history.deleted or ())}
+    for email in emails:
+        principal_cache.invalidate_user(email)
+    # Deuxième invalidation au commit : une requête concurrente entre le flush
+    # et le commit a pu remettre en cache l'ancienne version
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("principal_emails", set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals_after_commit(session):
+    for email in session.info.pop("principal_emails", ()):
+        principal_cache.invalidate_user(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_principals_after_rollback(session):
+    session.info.pop("principal_emails", None)
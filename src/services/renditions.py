@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import enum
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+from fastapi import HTTPException
+from libcloud.storage.types import ObjectDoesNotExistError
+from PIL import Image as PILImage
+from PIL import ImageFilter, ImageOps
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from sqlalchemy_file.storage import StorageManager
+
+from src.config import (RENDITION_CACHE_DIR, RENDITION_DEFAULT_QUALITY,
+                        RENDITION_MAX_SIZE, RENDITION_WORKERS, VARIANT_FORMAT,
+                        VARIANT_PLACEHOLDER_BLUR, VARIANT_PLACEHOLDER_SIZE,
+                        VARIANT_WIDTHS)
+from src.database import SessionLocal
+from src.models.models import Image
+from src.services.jobs import job_queue
+
+
+class RenditionFormat(str, enum.Enum):
+    WEBP = "webp"
+    AVIF = "avif"
+    JPEG = "jpeg"
+    PNG = "png"
+
+    @property
+    def media_type(self) -> str:
+        return f"image/{self.value}"
+
+    @property
+    def available(self) -> bool:
+        PILImage.init()
+        return self.value.upper() in PILImage.SAVE
+
+
+class RenditionSpec(NamedTuple):
+    width: Optional[int] = None
+    height: Optional[int] = None
+    format: RenditionFormat = RenditionFormat.WEBP
+    quality: int = RENDITION_DEFAULT_QUALITY
+
+    @property
+    def key(self) -> str:
+        return f"{self.width or 0}x{self.height or 0}-q{self.quality}.{self.format.value}"
+
+
+def rendition_path(file_id: str, spec: RenditionSpec) -> str:
+    # Les fichiers sont identifiés par un UUID immuable : la clé ne change jamais
+    return os.path.join(RENDITION_CACHE_DIR, file_id[:2], f"{file_id}-{spec.key}")
+
+
+def render(source: bytes, spec: RenditionSpec, blur: float = 0) -> bytes:
+    """Redimensionne (sans agrandir, proportions conservées), floute si `blur` (rayon) et encode une image."""
+    with PILImage.open(io.BytesIO(source)) as img:
+        # Dimensions lues dans l'en-tête, avant tout décodage : Pillow ne fait
+        # qu'avertir entre MAX_IMAGE_PIXELS et le double
+        if PILImage.MAX_IMAGE_PIXELS and img.width * img.height > PILImage.MAX_IMAGE_PIXELS:
+            raise PILImage.DecompressionBombError(f"Image de {img.width}x{img.height} pixels refusée")
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((spec.width or RENDITION_MAX_SIZE, spec.height or RENDITION_MAX_SIZE), PILImage.Resampling.LANCZOS)
+        if blur:
+            # Pas de filtre sur les images à palette
+            if img.mode not in ("RGB", "RGBA", "L", "LA"):
+                img = img.convert("RGBA")
+            img = img.filter(ImageFilter.GaussianBlur(blur))
+        if spec.format == RenditionFormat.JPEG and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        output = io.BytesIO()
+        img.save(output, format=spec.format.value.upper(), quality=spec.quality, optimize=True)
+        return output.getvalue()
+
+
+def generate_rendition(file_path: str, spec: RenditionSpec, source: Optional[bytes] = None) -> str:
+    """
+    Génère la déclinaison d'un fichier (`storage/file_id`) si elle n'est pas
+    déjà sur disque, et renvoie son chemin. L'écriture est atomique, deux
+    workers qui génèrent la même déclinaison ne peuvent pas la corrompre.
+    `source` évite de relire le fichier d'origine pour chaque déclinaison.
+    """
+    file_id = file_path.split("/")[-1]
+    path = rendition_path(file_id, spec)
+    if os.path.exists(path):
+        return path
+
+    if source is None:
+        source = StorageManager.get_file(file_path).read()
+    content = render(source, spec)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as tmp:
+        tmp.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+class RenditionService:
+    """Génère les déclinaisons dans un pool de workers, une seule fois par clé."""
+
+    def __init__(self, workers: int = RENDITION_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rendition")
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def get(self, file_path: str, spec: RenditionSpec) -> str:
+        if not spec.format.available:
+            raise HTTPException(status_code=415, detail=f"Format {spec.format.value} non supporté")
+
+        path = rendition_path(file_path.split("/")[-1], spec)
+        # Déjà en cache : servi tel quel, sans passer par le pool
+        if os.path.exists(path):
+            return path
+
+        # Les requêtes concurrentes sur la même déclinaison attendent la même génération
+        future = self._pending.get(path)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, generate_rendition, file_path, spec)
+            self._pending[path] = future
+            future.add_done_callback(lambda _: self._pending.pop(path, None))
+        try:
+            return await asyncio.shield(future)
+        except ObjectDoesNotExistError:
+            raise HTTPException(status_code=404, detail="Fichier de l'image introuvable")
+        except PILImage.UnidentifiedImageError:
+            raise HTTPException(status_code=415, detail="Le fichier n'est pas une image reconnue")
+        except (OSError, ValueError, SyntaxError, PILImage.DecompressionBombError):
+            # Fichier tronqué ou corrompu, dimensions hors limites
+            raise HTTPException(status_code=422, detail="Impossible de générer cette image")
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+rendition_service = RenditionService()
+
+
+@job_queue.task("image.variantes")
+def generate_variants(parametres: dict) -> None:
+    """
+    Pré-génère les déclinaisons standard (VARIANT_WIDTHS) d'une image et son
+    placeholder flou, et enregistre leurs métadonnées dans `Image.variantes`.
+    """
+    with SessionLocal() as db:
+        image = db.get(Image, parametres["image_id"])
+        # Image supprimée ou fichier remplacé depuis : une autre tâche s'en charge
+        if image is None or image.file["file_id"] != parametres["file_id"]:
+            return
+
+        file_path = image.file["path"]
+        source = StorageManager.get_file(file_path).read()
+        renditions = []
+        for width in VARIANT_WIDTHS:
+            spec = RenditionSpec(width=width, format=RenditionFormat(VARIANT_FORMAT))
+            with PILImage.open(generate_rendition(file_path, spec, source)) as rendition:
+                rendered_width, rendered_height = rendition.size
+            renditions.append({
+                "width": rendered_width,
+                "height": rendered_height,
+                "format": spec.format.value,
+                "url": f"/models/images/{image.id}/rendition?width={width}&format={spec.format.value}",
+            })
+
+        placeholder = RenditionSpec(VARIANT_PLACEHOLDER_SIZE, VARIANT_PLACEHOLDER_SIZE, RenditionFormat.WEBP, 30)
+        with PILImage.open(io.BytesIO(source)) as original:
+            original_width, original_height = ImageOps.exif_transpose(original).size
+        image.variantes = {
+            "width": original_width,
+            "height": original_height,
+            "renditions": renditions,
+            "placeholder": "data:image/webp;base64," + base64.b64encode(render(source, placeholder, VARIANT_PLACEHOLDER_BLUR)).decode("ascii"),
+        }
+        db.commit()
+
+
+def _enqueue_variants(session, image: Image) -> None:
+    job_queue.enqueue(session, "image.variantes", {"image_id": image.id, "file_id": image.file["file_id"]})
+
+
+@event.listens_for(Image, "after_insert")
+def _enqueue_variants_on_insert(mapper, connection, target):
+    _enqueue_variants(object_session(target), target)
+
+
+@event.listens_for(Image, "after_update")
+def _enqueue_variants_on_file_change(mapper, connection, target):
+    if inspect(target).attrs.file.history.has_changes():
+        _enqueue_variants(object_session(target), target)
@@ -0,0 +1,150 @@
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from src.config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+from src.models.models import RAL, Bois, Image, Produit
+from src.responses import dump_json
+from src.services.cache import TTLCache
+
+
+class CacheBackend:
+    """
+    Interface de stockage des réponses sérialisées.
+
+    Le backend mémoire ci-dessous suffit pour un worker ; un backend partagé
+    (Redis, memcached...) implémente ces quatre méthodes pour que tous les
+    workers voient les mêmes entrées et les mêmes invalidations.
+
+    Les entrées sont rangées sous la génération de leur namespace, lue par
+    l'appelant avant de charger les données : une entrée chargée pendant une
+    invalidation est écrite sous l'ancienne génération, déjà inatteignable.
+    """
+
+    def generation(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    def get(self, namespace: str, generation: int, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, generation: int, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    def invalidate(self, namespace: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Backend en mémoire du processus. L'invalidation incrémente la génération
+    du namespace : les anciennes entrées ne sont plus atteignables et sortent
+    du cache par LRU/TTL.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.cache = TTLCache(maxsize, ttl)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def get(self, namespace: str, generation: int, key: str) -> Optional[bytes]:
+        return self.cache.get((namespace, generation, key))
+
+    def set(self, namespace: str, generation: int, key: str, value: bytes, ttl: float) -> None:
+        self.cache.set((namespace, generation, key), value, ttl)
+
+    def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class ResponseCache:
+    """Cache read-through des réponses JSON des routes de données de référence."""
+
+    def __init__(self, backend: CacheBackend, ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def key(request: Request) -> str:
+        return f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))}"
+
+    async def get_or_set(
+        self,
+        namespace: str,
+        request: Request,
+        schema,
+        loader: Callable[[], Awaitable[Any]],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Optional[Response]:
+        """
+        Renvoie la réponse en cache, sinon appelle `loader`, sérialise son
+        résultat avec `schema` et le met en cache. Renvoie None si `loader`
+        ne renvoie rien (404 gérée par la route).
+
+        Avec des validateurs, la réponse est rangée sous son ETag, lu sur la
+        même base que les données : un réplica en retard ne met pas en cache
+        un ancien corps sous la nouvelle version.
+        """
+        key = self.key(request)
+        if headers and "ETag" in headers:
+            key = f"{key}#{headers['ETag']}"
+        # Lue une seule fois : une écriture commitée pendant `loader` invalide
+        # cette génération, la réponse chargée avant elle n'est jamais servie
+        generation = self.backend.generation(namespace)
+        content = self.backend.get(namespace, generation, key)
+        if content is None:
+            value = await loader()
+            if value is None:
+                return None
+            content = dump_json(schema, value)
+            self.backend.set(namespace, generation, key, content, self.ttl)
+        return Response(content=content, media_type="application/json", headers=headers)
+
+    def invalidate(self, namespaces: Iterable[str]) -> None:
+        for namespace in namespaces:
+            self.backend.invalidate(namespace)
+
+
+response_cache = ResponseCache(MemoryBackend())
+
+# Namespaces dont les réponses embarquent chaque modèle (ex: une image modifiée
+# change la réponse des bois, RAL et produits qui l'affichent)
+INVALIDATIONS = {
+    Image: ("images", "bois", "rals", "produits"),
+    Bois: ("bois", "produits"),
+    RAL: ("rals", "produits"),
+    Produit: ("produits",),
+}
+
+
+def _invalidate_on_change(mapper, connection, target):
+    namespaces = INVALIDATIONS[mapper.class_]
+    response_cache.invalidate(namespaces)
+    # Deuxième invalidation au commit : une lecture concurrente entre le flush
+    # et le commit a pu remettre en cache l'ancienne version
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("response_cache_namespaces", set()).update(namespaces)
+
+
+for model in INVALIDATIONS:
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, event_name, _invalidate_on_change)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    namespaces = session.info.pop("response_cache_namespaces", None)
+    if namespaces:
+        response_cache.invalidate(namespaces)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("response_cache_namespaces", None)
@@ -0,0 +1,219 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from sqlalchemy import (Column, Integer, MetaData, String, Table, Text, case,
+                        cast, delete, event, func, insert, inspect, literal,
+                        literal_column, select, text, union_all)
+from sqlalchemy.orm import Session
+
+from src.config import (SEARCH_PG_CONFIG, SEARCH_PRICE_RANGES,
+                        SEARCH_SIZE_RANGES)
+from src.models.models import RAL, Bois, Categorie, Produit
+from src.services.loaders import PRODUIT_LOADER
+
+_WORD = re.compile(r"\w+")
+
+# Index FTS5 (SQLite) : rowid = id du produit, texte déjà normalisé par `analyze`.
+# MetaData séparée : la table virtuelle n'est pas créée par create_all.
+produits_fts = Table(
+    "produits_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("nom", Text),
+    Column("description", Text),
+    Column("rank"),
+)
+
+FTS_DDL = "CREATE VIRTUAL TABLE produits_fts USING fts5(nom, description, tokenize='unicode61 remove_diacritics 2')"
+
+
+def pg_document(nom=Produit.nom, description=Produit.description):
+    """
+    Document tsvector des produits (Postgres). Tout est écrit en littéraux,
+    sans paramètre lié : l'expression doit être identique à celle de l'index GIN
+    `ix_produits_recherche` pour que le planificateur l'utilise.
+    """
+    return func.to_tsvector(
+        literal_column(f"'{SEARCH_PG_CONFIG}'::regconfig"),
+        func.coalesce(nom, literal_column("''")).concat(literal_column("' '")).concat(func.coalesce(description, literal_column("''"))),
+    )
+
+
+def fold(value: str) -> str:
+    """Minuscules sans accents (« Chêne Laqué » -> « chene laque »)."""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """Racinisation légère du français : pluriels et féminins."""
+    if len(word) > 4 and word.endswith("aux"):
+        return word[:-3] + "al"
+    if len(word) > 3 and word[-1] in "sx":
+        word = word[:-1]
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def analyze(value: Optional[str]) -> str:
+    return " ".join(stem(word) for word in _WORD.findall(fold(value or "")))
+
+
+def create_search_index(connection) -> None:
+    """Crée et alimente l'index FTS5 s'il n'existe pas encore (SQLite uniquement)."""
+    if connection.dialect.name != "sqlite":
+        return
+    if connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'produits_fts'")).first():
+        return
+    connection.execute(text(FTS_DDL))
+    rows = connection.execute(select(Produit.id, Produit.nom, Produit.description)).all()
+    if rows:
+        connection.execute(insert(produits_fts), [
+            {"rowid": produit_id, "nom": analyze(nom), "description": analyze(description)}
+            for produit_id, nom, description in rows
+        ])
+
+
+@event.listens_for(Produit.__table__, "after_create")
+def _create_search_index_with_table(target, connection, **kw):
+    create_search_index(connection)
+
+
+# Synchronisation de l'index dans la transaction de l'écriture (API, admin, scripts)
+@event.listens_for(Produit, "after_insert")
+@event.listens_for(Produit, "after_update")
+def _index_produit(mapper, connection, target):
+    if connection.dialect.name != "sqlite":
+        return
+    state = inspect(target)
+    if not (state.attrs.nom.history.has_changes() or state.attrs.description.history.has_changes()):
+        return
+    connection.execute(delete(produits_fts).where(produits_fts.c.rowid == target.id))
+    connection.execute(insert(produits_fts).values(
+        rowid=target.id, nom=analyze(target.nom), description=analyze(target.description)
+    ))
+
+
+@event.listens_for(Produit, "after_delete")
+def _unindex_produit(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        connection.execute(delete(produits_fts).where(produits_fts.c.rowid == target.id))
+
+
+def _ranges(column, bounds: List[float]):
+    """Expression CASE qui range `column` dans les tranches délimitées par `bounds`."""
+    labels = _range_labels(bounds)
+    return case(*((column < bound, label) for bound, label in zip(bounds, labels)), else_=labels[-1])
+
+
+def _range_labels(bounds: List[float]) -> List[str]:
+    lower = [0, *bounds]
+    return [f"{low:g}-{high:g}" for low, high in zip(lower, bounds)] + [f"{bounds[-1]:g}+"]
+
+
+RANGE_FACETS = {
+    "prix": SEARCH_PRICE_RANGES,
+    "hauteur": SEARCH_SIZE_RANGES,
+    "largeur": SEARCH_SIZE_RANGES,
+}
+
+
+class SearchService:
+    @staticmethod
+    def _matching(db: Session, q: Optional[str]):
+        """Requête des produits correspondant à `q` et expression de pertinence (plus petit = meilleur)."""
+        columns = (Produit.id, Produit.categorie, Produit.bois_id, Produit.ral_id, Produit.prix, Produit.hauteur, Produit.largeur)
+        terms = [stem(word) for word in _WORD.findall(fold(q or ""))]
+        if not terms:
+            return select(*columns, literal(0).label("rang"))
+
+        if db.get_bind().dialect.name == "postgresql":
+            document = pg_document()
+            query = func.websearch_to_tsquery(SEARCH_PG_CONFIG, q)
+            return select(*columns, (-func.ts_rank(document, query)).label("rang")).where(document.op("@@")(query))
+
+        # Chaque terme en préfixe, tous requis ; les guillemets neutralisent la syntaxe FTS5
+        matches = (
+            select(produits_fts.c.rowid, produits_fts.c.rank)
+            .where(literal_column("produits_fts").match(" ".join(f'"{term}"*' for term in terms)))
+            .subquery()
+        )
+        return (
+            select(*columns, matches.c.rank.label("rang"))
+            .join_from(Produit, matches, matches.c.rowid == Produit.id)
+        )
+
+    @staticmethod
+    def _facets(db: Session, resultats) -> Dict[str, List[dict]]:
+        """Toutes les facettes en une requête (UNION ALL de GROUP BY sur les résultats)."""
+        nombre = func.count().label("nombre")
+        queries = [
+            select(literal("categorie").label("facette"), cast(resultats.c.categorie, String).label("valeur"),
+                   literal(None, String).label("libelle"), nombre)
+            .group_by(resultats.c.categorie),
+            select(literal("bois"), cast(resultats.c.bois_id, String), Bois.nom, nombre)
+            .select_from(resultats.join(Bois, Bois.id == resultats.c.bois_id))
+            .group_by(resultats.c.bois_id, Bois.nom),
+            select(literal("ral"), cast(resultats.c.ral_id, String), RAL.nom, nombre)
+            .select_from(resultats.join(RAL, RAL.id == resultats.c.ral_id))
+            .group_by(resultats.c.ral_id, RAL.nom),
+        ]
+        for facette, bounds in RANGE_FACETS.items():
+            bucket = _ranges(resultats.c[facette], bounds)
+            queries.append(select(literal(facette), bucket, literal(None, String), nombre).group_by(bucket))
+
+        facettes: Dict[str, List[dict]] = {"categorie": [], "bois": [], "ral": [], **{name: [] for name in RANGE_FACETS}}
+        for facette, valeur, libelle, count in db.execute(union_all(*queries)):
+            if facette == "categorie":
+                valeur = Categorie[valeur].value
+            facettes[facette].append({"valeur": valeur, "libelle": libelle, "nombre": count})
+
+        for facette, values in facettes.items():
+            if facette in RANGE_FACETS:
+                order = _range_labels(RANGE_FACETS[facette])
+                values.sort(key=lambda value: order.index(value["valeur"]))
+            else:
+                values.sort(key=lambda value: -value["nombre"])
+        return facettes
+
+    @staticmethod
+    def search(
+        db: Session,
+        q: Optional[str] = None,
+        categorie: Optional[Categorie] = None,
+        bois_id: Optional[int] = None,
+        ral_id: Optional[int] = None,
+        prix_min: Optional[float] = None,
+        prix_max: Optional[float] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> dict:
+        query = SearchService._matching(db, q)
+        if categorie is not None:
+            query = query.where(Produit.categorie == categorie)
+        if bois_id is not None:
+            query = query.where(Produit.bois_id == bois_id)
+        if ral_id is not None:
+            query = query.where(Produit.ral_id == ral_id)
+        if prix_min is not None:
+            query = query.where(Produit.prix >= prix_min)
+        if prix_max is not None:
+            query = query.where(Produit.prix <= prix_max)
+        resultats = query.cte("resultats")
+
+        items = db.scalars(
+            select(Produit)
+            .options(*PRODUIT_LOADER)
+            .join(resultats, resultats.c.id == Produit.id)
+            .order_by(resultats.c.rang, Produit.id)
+            .limit(limit)
+            .offset(offset)
+        ).unique().all()
+        facettes = SearchService._facets(db, resultats)
+        return {
+            "items": items,
+            "total": sum(facette["nombre"] for facette in facettes["categorie"]),
+            "facettes": facettes,
+        }
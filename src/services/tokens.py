@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from src.config import (ACCESS_TOKEN_EXPIRE_MINUTES, TOKEN_CACHE_SIZE,
+                        TOKEN_REVOCATION_OVERLAP, TOKEN_REVOCATION_REFRESH)
+from src.models.models import Utilisateur
+from src.schemas.token import TokenData
+from src.services.cache import TTLCache
+from src.tasks import ALGORITHM, create_access_token, get_signing_key
+
+
+class TokenVerifier:
+    """
+    Vérification des tokens d'accès sans base de données : signature vérifiée
+    avec la clé construite une fois, puis token vérifié gardé en mémoire
+    jusqu'à son expiration. Un token déjà vu coûte une lecture de dictionnaire.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self._cache = TTLCache(maxsize, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+    @staticmethod
+    def issue(user: Utilisateur, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)) -> str:
+        return create_access_token(
+            data={"sub": user.email, "uid": user.id, "ver": user.token_version or 0},
+            expires_delta=expires_delta,
+        )
+
+    def verify(self, token: str) -> TokenData:
+        """Contenu d'un token valide et non expiré ; JWTError sinon. La révocation est vérifiée à part."""
+        token_data = self._cache.get(token)
+        if token_data is not None:
+            return token_data
+
+        payload = jwt.decode(token, get_signing_key(), algorithms=[ALGORITHM], options={"require_exp": True})
+        email, user_id, version = payload.get("sub"), payload.get("uid"), payload.get("ver")
+        # Tokens émis avant les versions : impossibles à révoquer, une nouvelle connexion est demandée
+        if email is None or not isinstance(user_id, int) or not isinstance(version, int):
+            raise JWTError("Token sans identifiant ou sans version")
+        token_data = TokenData(email=email, id=user_id, version=version)
+        self._cache.set(token, token_data, payload["exp"] - time.time())
+        return token_data
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class TokenRevocations:
+    """
+    Version courante des tokens par utilisateur (seuls les utilisateurs qui
+    ont déjà révoqué leurs tokens y figurent) : un token d'une version
+    antérieure est révoqué.
+
+    Les révocations de ce processus sont prises en compte dès leur commit
+    (événement after_commit), celles des autres workers en relisant, au plus
+    toutes les `refresh_interval` secondes et par une seule requête HTTP à la
+    fois, les utilisateurs dont `date_revocation` est récente. La fenêtre
+    relue recouvre la précédente de `overlap` secondes : une transaction
+    commitée après sa date de révocation, ou datée par un serveur en retard,
+    n'est pas manquée.
+    """
+
+    def __init__(self, refresh_interval: float = TOKEN_REVOCATION_REFRESH, overlap: float = TOKEN_REVOCATION_OVERLAP):
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        # Début du dernier chargement réussi, None tant que la carte n'est pas chargée
+        self._since: Optional[datetime] = None
+        self._next_refresh = 0.0
+        self._refreshing = False
+
+    def is_revoked(self, user_id: int, version: int) -> bool:
+        return version < self._versions.get(user_id, 0)
+
+    def record(self, user_id: int, version: int) -> None:
+        with self._lock:
+            if version > self._versions.get(user_id, 0):
+                self._versions[user_id] = version
+
+    def needs_refresh(self) -> bool:
+        # Avant le premier chargement, chaque requête attend la carte complète
+        if self._since is None:
+            return True
+        return not self._refreshing and time.monotonic() >= self._next_refresh
+
+    async def refresh(self, db: AsyncSession) -> None:
+        started = datetime.utcnow()
+        query = select(Utilisateur.id, Utilisateur.token_version)
+        if self._since is None:
+            query = query.where(Utilisateur.token_version > 0)
+        else:
+            query = query.where(Utilisateur.date_revocation >= self._since - self.overlap)
+        self._refreshing = True
+        try:
+            rows = (await db.execute(query)).all()
+            await db.commit()
+        finally:
+            self._refreshing = False
+        for user_id, version in rows:
+            self.record(user_id, version)
+        self._since = started
+        self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._since = None
+
+
+token_verifier = TokenVerifier()
+token_revocations = TokenRevocations()
+
+
+# La version est incrémentée par revoke_tokens_on_password_change (src.models.models) ;
+# elle n'est connue du processus qu'au commit : une transaction annulée ne doit
+# pas révoquer des tokens encore valides en base
+@event.listens_for(Utilisateur, "after_update")
+def collect_token_version(mapper, connection, target):
+    # token_version est relue après l'UPDATE (pas d'historique) : date_revocation marque l'incrément
+    state = inspect(target)
+    session = object_session(target)
+    if state.attrs.date_revocation.history.added and session is not None:
+        session.info.setdefault("token_versions", {})[state.identity[0]] = target.token_version
+
+
+@event.listens_for(Session, "after_commit")
+def _record_token_versions_after_commit(session):
+    for user_id, version in session.info.pop("token_versions", {}).items():
+        token_revocations.record(user_id, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_token_versions_after_rollback(session):
+    session.info.pop("token_versions", None)
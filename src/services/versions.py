@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from itertools import chain
+from typing import Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.database import replica_read
+from src.dependencies import get_async_db
+from src.models.models import TableVersion
+from src.responses import etag_matches
+from src.services.response_cache import INVALIDATIONS
+
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+# Incrémente, dans la transaction de l'écriture, la version de chaque namespace
+# dont les réponses embarquent un objet modifié (API, admin, scripts)
+@event.listens_for(Session, "after_flush")
+def bump_table_versions(session, flush_context):
+    namespaces = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        namespaces.update(INVALIDATIONS.get(type(obj), ()))
+    if not namespaces:
+        return
+
+    connection = session.connection()
+    now = datetime.utcnow()
+    # Upsert : deux premières écritures concurrentes d'un namespace ne se
+    # heurtent pas sur la clé primaire (UPDATE puis INSERT sous READ COMMITTED)
+    statement = UPSERTS[connection.dialect.name](TableVersion).values([
+        {"nom": namespace, "version": 1, "date_modification": now} for namespace in sorted(namespaces)
+    ])
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[TableVersion.nom],
+        set_={"version": TableVersion.version + 1, "date_modification": now},
+    ))
+
+
+# Même réplica que les données de la requête (RoutingSession) : ETag et contenu restent cohérents
+@replica_read
+async def _get_version(db: AsyncSession, namespace: str) -> Optional[TableVersion]:
+    return await db.get(TableVersion, namespace)
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+class ConditionalGet:
+    """
+    Dépendance des routes du catalogue : calcule ETag / Last-Modified depuis la
+    version du namespace et répond 304 avant toute requête sur les données
+    si le client a déjà la représentation courante.
+    """
+
+    def __init__(self, namespace: str, cache_control: Optional[str] = None):
+        self.namespace = namespace
+        self.cache_control = cache_control
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+    ) -> Dict[str, str]:
+        row = await _get_version(db, self.namespace)
+        version = row.version if row else 0
+        headers = {"ETag": f'"{self.namespace}-{version}"'}
+        last_modified = row.date_modification.replace(tzinfo=timezone.utc) if row else None
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+        if self.cache_control:
+            headers["Cache-Control"] = self.cache_control
+
+        # If-None-Match est prioritaire sur If-Modified-Since
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, headers["ETag"])
+        else:
+            not_modified = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+        return headers
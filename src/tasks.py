@@ -1,8 +1,12 @@
+import asyncio
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from dotenv import load_dotenv
-from jose import jwt
+from jose import jwk, jwt
 from passlib.context import CryptContext
 
 load_dotenv()
@@ -25,6 +29,42 @@ def verify_password(plain_password, hashed_password) -> bool:
 def get_password_hash(password) -> str:
     return pwd_context.hash(password)
 
+def is_password_hash(value) -> bool:
+    return pwd_context.identify(value) is not None
+
+# Pool de processus dédié au hachage bcrypt (~250 ms CPU par opération) :
+# la boucle d'événements et les connexions à la base ne sont jamais bloquées
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", os.cpu_count() or 1))
+_hashing_executor: ProcessPoolExecutor = None
+
+def get_hashing_executor() -> ProcessPoolExecutor:
+    global _hashing_executor
+    if _hashing_executor is None:
+        _hashing_executor = ProcessPoolExecutor(
+            max_workers=HASHING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hashing_executor
+
+def shutdown_hashing_executor() -> None:
+    global _hashing_executor
+    if _hashing_executor is not None:
+        _hashing_executor.shutdown(cancel_futures=True)
+        _hashing_executor = None
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), get_password_hash, password)
+
+@lru_cache(maxsize=None)
+def get_signing_key():
+    """Clé de signature des tokens, construite une seule fois (jose la reconstruit à chaque appel sinon)."""
+    return jwk.construct(SECRET_KEY, ALGORITHM)
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -32,5 +72,5 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, get_signing_key(), algorithm=ALGORITHM)
     return encoded_jwt
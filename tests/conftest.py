@@ -0,0 +1,180 @@
+"""
+Tests de l'API sur une base SQLite jetable, créée par les migrations Alembic.
+
+Les moteurs, le stockage et les répertoires de fichiers sont créés à l'import
+de src, relativement au répertoire courant : on se place dans un répertoire
+temporaire avant tout import de l'application.
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="tests-api-")
+sys.path.insert(0, ROOT)
+os.chdir(WORKDIR)
+# SQLite même si un .env configure Postgres ; pas de workers de tâches de fond ni de profileur SQL
+os.environ.update({
+    "POSTGRES_SERVER": "", "JOB_WORKERS": "0", "QUERY_PROFILER_SAMPLE_RATE": "0", "QUERY_SLOW_THRESHOLD": "0",
+})
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from PIL import Image as PILImage  # noqa: E402
+from sqlalchemy import delete, event, insert  # noqa: E402
+
+from src.database import SessionLocal, engine, named_engines  # noqa: E402
+from src.migrations import run_migrations  # noqa: E402
+from src.models.models import (RAL, Adresse, Bois, Categorie, Commande,  # noqa: E402
+                               Gender, Image, Produit, StatutCommande, Tache,
+                               Utilisateur, commande_produit, produit_image,
+                               produit_options)
+from src.services.file import upload_file  # noqa: E402
+from src.services.principals import principal_cache  # noqa: E402
+from src.services.response_cache import response_cache  # noqa: E402
+from src.services.search import produits_fts  # noqa: E402
+from src.services.tokens import TokenVerifier, token_revocations  # noqa: E402
+from src.tasks import get_password_hash  # noqa: E402
+
+PASSWORD = "tests-password"
+_password_hash = None
+
+
+def pytest_unconfigure(config):
+    os.chdir(ROOT)
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def database():
+    run_migrations()
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from src.main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class QueryCounter:
+    """Requêtes SQL exécutées sur tous les moteurs de l'application (before_cursor_execute)."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements.clear()
+        for sync_engine in named_engines().values():
+            event.listen(sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc_info):
+        for sync_engine in named_engines().values():
+            event.remove(sync_engine, "before_cursor_execute", self)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries():
+    return QueryCounter()
+
+
+def png() -> bytes:
+    output = io.BytesIO()
+    PILImage.new("RGB", (8, 8), (200, 120, 40)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def create_image(content: bytes, filename: str, content_type: str) -> int:
+    with SessionLocal() as db:
+        image = Image(filename=filename, file=upload_file(content, filename, content_type))
+        db.add(image)
+        db.commit()
+        return image.id
+
+
+def email(index: int) -> str:
+    return f"u{index}@tests.example"
+
+
+def auth_headers(index: int) -> dict:
+    """En-têtes d'un token d'accès de l'utilisateur `email(index)`, sans passer par bcrypt."""
+    with SessionLocal() as db:
+        utilisateur = db.query(Utilisateur).filter(Utilisateur.email == email(index)).one()
+        return {"Authorization": f"Bearer {TokenVerifier.issue(utilisateur)}"}
+
+
+def reset_data() -> None:
+    """Vide les tables de données et les caches en mémoire (réponses, utilisateurs authentifiés, révocations)."""
+    with engine.begin() as connection:
+        for table in (commande_produit, Commande.__table__, Adresse.__table__, produit_options, produit_image,
+                      produits_fts, Produit.__table__, Bois.__table__, RAL.__table__, Image.__table__,
+                      Tache.__table__, Utilisateur.__table__):
+            connection.execute(delete(table))
+    response_cache.invalidate(("images", "bois", "rals", "produits"))
+    principal_cache.clear()
+    token_revocations.clear()
+
+
+def seed(n: int) -> None:
+    """
+    `n` lignes de chaque liste, avec toutes les relations des schémas de
+    réponse : produits (bois et RAL illustrés, 2 images), utilisateurs
+    (2 adresses, 2 commandes de 2 produits chacune).
+    """
+    global _password_hash
+    if _password_hash is None:
+        _password_hash = get_password_hash(PASSWORD)
+    reset_data()
+    with SessionLocal() as db:
+        images = [Image(filename=f"image-{i}.png", file=upload_file(png(), f"image-{i}.png", "image/png")) for i in range(2 * n)]
+        db.add_all(images)
+        db.flush()
+        bois = [Bois(nom=f"bois {i}", image_id=images[i].id) for i in range(n)]
+        rals = [RAL(nom=f"RAL {i}", image_id=images[n + i].id) for i in range(n)]
+        db.add_all(bois + rals)
+        db.flush()
+        produits = [
+            Produit(nom=f"Portail {i}", description="Portail battant", prix=100.0 + i, categorie=Categorie.PORTAIL_BATTANT,
+                    hauteur=100.0 + i, largeur=200.0 + i, mitEnAvant=True, meilleurVente=True,
+                    bois_id=bois[i].id, ral_id=rals[i].id)
+            for i in range(n)
+        ]
+        db.add_all(produits)
+        db.flush()
+        db.execute(insert(produit_image), [
+            {"produit_id": produit.id, "image_id": images[(i + offset) % len(images)].id}
+            for i, produit in enumerate(produits) for offset in (0, 1)
+        ])
+        utilisateurs = [
+            Utilisateur(sexe=Gender.HOMME, nom=f"nom {i}", prenom=f"prénom {i}", telephone="0600000000",
+                        email=email(i), mot_de_passe=_password_hash)
+            for i in range(n)
+        ]
+        db.add_all(utilisateurs)
+        db.flush()
+        db.add_all([
+            Adresse(nom="nom", prenom="prénom", adresse=f"{i} rue des Tests", complement="", ville="Lyon",
+                    code_postal="69000", pays="France", utilisateur_id=utilisateur.id)
+            for utilisateur in utilisateurs for i in range(2)
+        ])
+        commandes = [Commande(statut=StatutCommande.EN_ATTENTE, utilisateur_id=utilisateur.id) for utilisateur in utilisateurs for _ in range(2)]
+        db.add_all(commandes)
+        db.flush()
+        db.execute(insert(commande_produit), [
+            {"commande_id": commande.id, "produit_id": produits[(i + offset) % n].id}
+            for i, commande in enumerate(commandes) for offset in range(min(2, n))
+        ])
+        db.commit()
@@ -0,0 +1,70 @@
+"""Révocation des tokens au changement de mot de passe : prise en compte au commit seulement."""
+import pytest
+
+from conftest import auth_headers, email, seed
+from src.database import SessionLocal
+from src.models.models import Utilisateur
+from src.services.tokens import token_revocations
+from src.tasks import get_password_hash
+
+@pytest.fixture
+def produit_id(client, database):
+    seed(1)
+    return client.get("/models/produits/").json()["items"][0]["id"]
+
+
+def change_password(commit: bool) -> int:
+    with SessionLocal() as db:
+        utilisateur = db.query(Utilisateur).filter(Utilisateur.email == email(0)).one()
+        utilisateur.mot_de_passe = get_password_hash("nouveau-mot-de-passe")
+        db.flush()
+        if commit:
+            db.commit()
+        else:
+            db.rollback()
+        return utilisateur.id
+
+
+def test_rollback_keeps_tokens(client, produit_id):
+    headers = auth_headers(0)
+    utilisateur_id = change_password(commit=False)
+    assert not token_revocations.is_revoked(utilisateur_id, 0)
+    response = client.post("/models/commandes/", headers=headers, json={"produit_ids": [produit_id]})
+    assert response.status_code == 201, response.text
+
+
+def test_commit_revokes_tokens(client, produit_id):
+    headers = auth_headers(0)
+    assert client.post("/models/commandes/", headers=headers, json={"produit_ids": [produit_id]}).status_code == 201
+    utilisateur_id = change_password(commit=True)
+    assert token_revocations.is_revoked(utilisateur_id, 0)
+    response = client.post("/models/commandes/", headers=headers, json={"produit_ids": [produit_id]})
+    assert response.status_code == 401
+    response = client.post("/models/commandes/", headers=auth_headers(0), json={"produit_ids": [produit_id]})
+    assert response.status_code == 201, response.text
+
+
+def test_stale_version_read_from_database(client, produit_id, monkeypatch):
+    # Révocation d'un autre worker pas encore relue : détectée à la résolution de l'utilisateur, sur le primaire
+    headers = auth_headers(0)
+    change_password(commit=True)
+    token_revocations.clear()
+    monkeypatch.setattr(token_revocations, "needs_refresh", lambda: False)
+    response = client.post("/models/commandes/", headers=headers, json={"produit_ids": [produit_id]})
+    assert response.status_code == 401
+
+
+def test_interleaved_password_changes(client, produit_id):
+    # Deux réinitialisations lisent la même version avant d'écrire (hachage bcrypt entre les deux)
+    with SessionLocal() as first, SessionLocal() as second:
+        utilisateurs = [db.query(Utilisateur).filter(Utilisateur.email == email(0)).one() for db in (first, second)]
+        utilisateurs[0].mot_de_passe = get_password_hash("premier-mot-de-passe")
+        first.commit()
+        # Token émis sous le premier nouveau mot de passe
+        headers = auth_headers(0)
+        utilisateurs[1].mot_de_passe = get_password_hash("second-mot-de-passe")
+        second.commit()
+        assert utilisateurs[1].token_version == 2
+    assert token_revocations.is_revoked(utilisateurs[1].id, 1)
+    response = client.post("/models/commandes/", headers=headers, json={"produit_ids": [produit_id]})
+    assert response.status_code == 401
@@ -0,0 +1,45 @@
+"""Création de commandes : en attente, pour l'utilisateur connecté, identifiants dans l'ordre des commandes."""
+import pytest
+
+from conftest import auth_headers, email, seed
+from src.database import SessionLocal
+from src.models.models import Utilisateur
+
+
+@pytest.fixture(scope="module")
+def utilisateurs(client, database):
+    seed(2)
+    with SessionLocal() as db:
+        return [db.query(Utilisateur.id).filter(Utilisateur.email == email(i)).scalar() for i in range(2)]
+
+
+@pytest.fixture(scope="module")
+def produit_ids(client, utilisateurs):
+    return [item["id"] for item in client.get("/models/produits/").json()["items"]]
+
+
+def test_create_for_current_user(client, utilisateurs, produit_ids):
+    # Un utilisateur_id dans le corps est ignoré : la commande est celle de l'utilisateur connecté
+    response = client.post("/models/commandes/", headers=auth_headers(0),
+                           json={"produit_ids": produit_ids[:1], "utilisateur_id": utilisateurs[1]})
+    assert response.status_code == 201, response.text
+    assert response.json()["utilisateur_id"] == utilisateurs[0]
+
+
+def test_create_requires_authentication(client, produit_ids):
+    response = client.post("/models/commandes/", json={"produit_ids": produit_ids[:1]})
+    assert response.status_code == 401
+
+
+def test_batch_order(client, utilisateurs, produit_ids):
+    # Statut fourni par le client ignoré : toute commande créée est en attente
+    commandes = [{"produit_ids": [produit_ids[i % 2]], "statut": statut}
+                 for i, statut in enumerate(["en-attente", "en-cours", "livre", "annule"])]
+    response = client.post("/models/commandes/batch", headers=auth_headers(1), json=commandes)
+    assert response.status_code == 201, response.text
+    created = response.json()
+    assert [commande["utilisateur_id"] for commande in created] == [utilisateurs[1]] * 4
+    for commande, sent in zip(created, commandes):
+        stored = client.get(f"/models/commandes/{commande['id']}").json()
+        assert commande["statut"] == stored["statut"] == "en-attente"
+        assert [produit["id"] for produit in stored["produits"]] == sent["produit_ids"]
@@ -0,0 +1,23 @@
+"""Route des fichiers d'image : validation conditionnelle (ETag)."""
+import pytest
+
+from conftest import create_image, png
+
+
+@pytest.fixture(scope="module")
+def image_id(database):
+    return create_image(png(), "fichier.png", "image/png")
+
+
+@pytest.mark.parametrize("validator", ["{etag}", "W/{etag}", '"autre", W/{etag}', "*"])
+def test_file_not_modified(client, image_id, validator):
+    etag = client.get(f"/models/images/{image_id}/file").headers["etag"]
+    response = client.get(f"/models/images/{image_id}/file", headers={"If-None-Match": validator.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_file_modified(client, image_id):
+    response = client.get(f"/models/images/{image_id}/file", headers={"If-None-Match": 'W/"autre"'})
+    assert response.status_code == 200
+    assert response.content == png()
@@ -0,0 +1,105 @@
+"""
+Chaque filtre et chaque tri des listes de produits et de commandes est servi
+par un index (aucun parcours complet de table, d'après EXPLAIN QUERY PLAN),
+sur une base SQLite temporaire mise à jour par `alembic upgrade head` : ce
+sont les index des migrations qui sont vérifiés, pas ceux des modèles.
+
+Les filtres d'intervalle (`prix_min`, `hauteur_max`...) sont testés avec le
+tri sur la même colonne : avec le tri par id, SQLite (sans statistiques
+d'histogramme) préfère à juste titre parcourir la clé primaire dans l'ordre
+en s'arrêtant à LIMIT. Seule la liste non filtrée triée par id peut
+parcourir la table, dans l'ordre de la clé primaire.
+"""
+import enum
+import re
+from datetime import timedelta
+from typing import List, Tuple, get_args
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from scripts.dataset import NOW, seed
+from src.migrations import get_config
+from src.schemas.filters import (CommandeFiltres, ProduitFiltres, TriCommande,
+                                 TriProduit)
+from src.services.models import CommandeService, ProduitService
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+# Valeurs sélectives (~1 % des lignes), comme les filtres réels
+SAMPLES = {
+    "prix_min": 9900.0, "prix_max": 100.0,
+    "hauteur_min": 297.0, "hauteur_max": 53.0,
+    "largeur_min": 595.0, "largeur_max": 55.0,
+    "date_min": NOW - timedelta(days=10), "date_max": NOW - timedelta(days=1085),
+}
+TYPE_SAMPLES = {int: 1, bool: True}
+
+
+def sample(name: str, annotation):
+    """Valeur d'exemple pour un champ de filtre (Optional[X] -> X)."""
+    if name in SAMPLES:
+        return SAMPLES[name]
+    python_type = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if issubclass(python_type, enum.Enum):
+        return next(iter(python_type))
+    return TYPE_SAMPLES[python_type]
+
+
+def cases(service, filtres_class, tri_enum) -> List[Tuple]:
+    result = []
+    for name, field in filtres_class.model_fields.items():
+        options = {"filtres": filtres_class(**{name: sample(name, field.annotation)})}
+        column = name.rsplit("_", 1)[0]
+        if name.endswith(("_min", "_max")) and column in service.sort_columns:
+            options["tri"] = column
+        result.append(pytest.param(service, name, options, id=f"{service.model.__tablename__}.{name}"))
+    for tri in tri_enum:
+        name = f"tri={tri.value}"
+        options = {"filtres": filtres_class(), "tri": tri.value}
+        result.append(pytest.param(service, name, options, id=f"{service.model.__tablename__}.{name}"))
+    return result
+
+
+@pytest.fixture(scope="module")
+def migrated(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('index') / 'index.db'}")
+    with engine.connect() as connection:
+        command.upgrade(get_config(connection), "head")
+    with Session(engine) as db:
+        seed(db)
+        yield engine, db
+    engine.dispose()
+
+
+def query_plan(engine, db: Session, service, options: dict) -> List[str]:
+    """Plan de la requête principale (la première exécutée) de service.get_page."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        service.get_page(db, None, 20, **options)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = statements[0]
+    return [row[3] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+
+@pytest.mark.parametrize(
+    "service, name, options",
+    cases(ProduitService, ProduitFiltres, TriProduit) + cases(CommandeService, CommandeFiltres, TriCommande),
+)
+def test_index_utilise(migrated, service, name, options):
+    engine, db = migrated
+    table = service.model.__tablename__
+    plan = query_plan(engine, db, service, options)
+    # Liste complète par id : parcours de la clé primaire, arrêté à LIMIT
+    if name == "tri=id":
+        plan = [detail for detail in plan if detail != f"SCAN {table}"]
+    scans = [detail for detail in plan if (match := FULL_SCAN.match(detail)) and match.group(1) == table]
+    assert not scans, " | ".join(plan)
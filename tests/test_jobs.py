@@ -0,0 +1,40 @@
+"""File de tâches : reprise des tâches abandonnées par un worker arrêté, bornée par max_attempts."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from conftest import reset_data
+from src.config import JOB_STALE_AFTER
+from src.database import SessionLocal
+from src.models.models import StatutTache, Tache
+from src.services.jobs import JobQueue
+
+
+def stale_job(tentatives: int) -> int:
+    """Tâche `en-cours` dont le worker s'est arrêté (aucune mise à jour depuis JOB_STALE_AFTER)."""
+    old = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER + 60)
+    with SessionLocal() as db:
+        job_id = db.execute(insert(Tache).values(
+            nom="test", parametres={}, statut=StatutTache.EN_COURS, tentatives=tentatives,
+            date_creation=old, date_execution=old, date_modification=old,
+        ).returning(Tache.id)).scalar_one()
+        db.commit()
+    return job_id
+
+
+def statut(job_id: int) -> StatutTache:
+    with SessionLocal() as db:
+        return db.scalar(select(Tache.statut).where(Tache.id == job_id))
+
+
+def test_stale_job_reclaimed_until_max_attempts(database):
+    reset_data()
+    queue = JobQueue(workers=2, max_attempts=3)
+    queue.task("test")(lambda parametres: None)
+    exhausted = stale_job(tentatives=3)
+    retried = stale_job(tentatives=1)
+
+    job = queue._claim()
+    assert job is not None and job[0] == retried and job[3] == 2
+    assert statut(exhausted) == StatutTache.ECHEC
+    assert queue._claim() is None
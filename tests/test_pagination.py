@@ -0,0 +1,29 @@
+"""Pagination par clé : le curseur n'est accepté qu'avec le tri qui l'a produit."""
+import pytest
+
+from conftest import seed
+
+
+@pytest.fixture(scope="module")
+def next_cursor(client, database):
+    seed(3)
+    response = client.get("/models/produits/", params={"tri": "-prix", "limit": 1})
+    assert response.status_code == 200, response.text
+    return response.json()["next_cursor"]
+
+
+def test_cursor_same_tri(client, next_cursor):
+    response = client.get("/models/produits/", params={"tri": "-prix", "limit": 1, "cursor": next_cursor})
+    assert response.status_code == 200, response.text
+    assert [item["prix"] for item in response.json()["items"]] == [101.0]
+
+
+@pytest.mark.parametrize("tri", ["prix", "hauteur", "id"])
+def test_cursor_other_tri(client, next_cursor, tri):
+    response = client.get("/models/produits/", params={"tri": tri, "limit": 1, "cursor": next_cursor})
+    assert response.status_code == 400
+
+
+def test_cursor_invalid(client, database):
+    response = client.get("/models/produits/", params={"cursor": "pas-un-curseur"})
+    assert response.status_code == 400
@@ -0,0 +1,93 @@
+"""Détection des N+1 par QueryProfilerMiddleware, en mode erreur (tests) et en mode journal."""
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.metrics import RequestTimings, current_request, instrument_engine
+from src.profiler import NPlusOneError, QueryProfiler, QueryProfilerMiddleware
+
+SCOPE = {"type": "http", "method": "GET", "root_path": ""}
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def profiled(engine, queries: int, error: Exception = None, raise_on_n_plus_one: bool = True):
+    """Middleware autour d'une application qui exécute `queries` fois la même requête, puis lève `error`."""
+    profiler = QueryProfiler(sample_rate=1, n_plus_one_threshold=3, slow_threshold=0,
+                             raise_on_n_plus_one=raise_on_n_plus_one)
+    profiler.instrument(engine)
+
+    async def app(scope, receive, send):
+        with engine.connect() as connection:
+            for i in range(queries):
+                connection.execute(text("SELECT :i"), {"i": i})
+        if error is not None:
+            raise error
+
+    return QueryProfilerMiddleware(app, profiler)
+
+
+def call(middleware):
+    asyncio.run(middleware(dict(SCOPE), None, None))
+
+
+def test_n_plus_one_raises(engine):
+    with pytest.raises(NPlusOneError, match="4 x SELECT"):
+        call(profiled(engine, 4))
+
+
+def test_under_threshold(engine):
+    call(profiled(engine, 3))
+
+
+def test_app_error_is_chained(engine):
+    error = RuntimeError("erreur de l'application")
+    with pytest.raises(NPlusOneError) as raised:
+        call(profiled(engine, 4, error))
+    assert raised.value.__cause__ is error
+
+
+def test_app_error_without_n_plus_one(engine):
+    with pytest.raises(RuntimeError, match="erreur de l'application"):
+        call(profiled(engine, 1, RuntimeError("erreur de l'application")))
+
+
+def test_n_plus_one_logged(engine, caplog, monkeypatch):
+    # fileConfig d'Alembic (migrations de la session de tests) désactive les loggers existants
+    monkeypatch.setattr(logging.getLogger("src.profiler"), "disabled", False)
+    with caplog.at_level(logging.WARNING, logger="src.profiler"):
+        call(profiled(engine, 4, raise_on_n_plus_one=False))
+    assert "N+1 probable sur GET <non routé>" in caplog.text
+
+
+def test_slow_query_explain_keeps_transaction(tmp_path, caplog, monkeypatch):
+    monkeypatch.setattr(logging.getLogger("src.profiler"), "disabled", False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'lente.db'}")
+    profiler = QueryProfiler(sample_rate=0, slow_threshold=1e-9)
+    profiler.instrument(engine)
+    timings = RequestTimings()
+    instrument_engine(engine, "test")
+    request_token = current_request.set(timings)
+    try:
+        with caplog.at_level(logging.WARNING, logger="src.profiler"), engine.connect() as connection:
+            connection.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            connection.commit()
+            connection.execute(text("INSERT INTO t VALUES (1)"))
+            assert connection.execute(text("SELECT id FROM t WHERE id = 1")).scalar() == 1
+            # Savepoint de l'EXPLAIN relâché : la transaction de la requête reste la même
+            assert connection.in_transaction() and not connection.in_nested_transaction()
+            connection.rollback()
+            assert connection.execute(text("SELECT count(*) FROM t")).scalar() == 0
+    finally:
+        current_request.reset(request_token)
+        engine.dispose()
+    assert "Plan :\nSEARCH t USING INTEGER PRIMARY KEY" in caplog.text
+    # Ni l'EXPLAIN ni ses savepoints ne comptent dans Server-Timing
+    assert timings.queries == 4
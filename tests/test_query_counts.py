@@ -0,0 +1,52 @@
+"""
+Nombre de requêtes SQL par route de liste : borné et indépendant du nombre
+de lignes (chargement des relations des schémas de réponse sans N+1).
+"""
+import pytest
+
+from conftest import email, seed
+from src.database import SessionLocal
+from src.models.models import Utilisateur
+
+SIZES = (1, 10)
+
+# Route -> nombre maximal de requêtes SQL, à 1 ligne comme à N lignes. Les
+# routes du catalogue lisent en plus la version de leur namespace (ETag).
+BOUNDS = {
+    "/models/images/": 1,
+    "/models/bois/": 2,
+    "/models/rals/": 2,
+    "/models/adresses/": 1,
+    "/models/utilisateurs/{utilisateur_id}/adresses": 1,
+    # produits, images des produits (selectinload) + version
+    "/models/produits/": 3,
+    "/models/produits/categorie/portail-battant": 3,
+    "/models/produits/meilleurs-ventes": 3,
+    "/models/produits/mis-en-avant": 3,
+    # + agrégats des facettes (une seule requête UNION ALL)
+    "/models/produits/search?q=portail": 4,
+    # commandes, produits (avec bois / RAL et leurs images), images des produits
+    "/models/commandes/": 3,
+    "/models/utilisateurs/{utilisateur_id}/commandes": 3,
+    # chargeur par lots : utilisateurs, adresses, commandes, commande_produit, produits, images
+    "/models/utilisateurs/": 6,
+}
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n}-lignes")
+def seeded(request, database):
+    seed(request.param)
+    with SessionLocal() as db:
+        utilisateur_id = db.query(Utilisateur.id).filter(Utilisateur.email == email(0)).scalar()
+    return {"n": request.param, "utilisateur_id": utilisateur_id}
+
+
+@pytest.mark.parametrize("route", BOUNDS)
+def test_list_query_count(client, count_queries, seeded, route):
+    with count_queries:
+        response = client.get(route.format(utilisateur_id=seeded["utilisateur_id"]))
+    assert response.status_code == 200, response.text
+    body = response.json()
+    items = body["items"] if isinstance(body, dict) and "items" in body else body
+    assert items, "la liste ne doit pas être vide"
+    assert count_queries.count <= BOUNDS[route], "\n".join(count_queries.statements)
@@ -0,0 +1,58 @@
+"""Déclinaisons des images : route (fichiers hostiles ou invalides) et pré-génération."""
+import base64
+import io
+
+import pytest
+from PIL import Image as PILImage
+from PIL import ImageStat
+
+from conftest import create_image, png
+from src.config import VARIANT_PLACEHOLDER_SIZE, VARIANT_WIDTHS
+from src.database import SessionLocal
+from src.models.models import Image
+from src.services.renditions import generate_variants
+
+
+@pytest.fixture(scope="module")
+def image_id(database):
+    return create_image(png(), "valide.png", "image/png")
+
+
+def test_rendition(client, image_id):
+    response = client.get(f"/models/images/{image_id}/rendition", params={"width": 4, "format": "png"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+
+
+def test_rendition_not_an_image(client, database):
+    image_id = create_image(b"ceci n'est pas une image", "faux.png", "image/png")
+    response = client.get(f"/models/images/{image_id}/rendition", params={"width": 4})
+    assert response.status_code == 415
+
+
+def test_rendition_decompression_bomb(client, image_id, monkeypatch):
+    # 8x8 pixels au-delà de la limite : refusée sur l'en-tête, sans décodage
+    monkeypatch.setattr(PILImage, "MAX_IMAGE_PIXELS", 16)
+    response = client.get(f"/models/images/{image_id}/rendition", params={"width": 5, "format": "png"})
+    assert response.status_code == 422
+
+
+def test_variants_placeholder_is_blurred(database):
+    # Damier noir et blanc : le flou rapproche chaque pixel du gris moyen
+    checkerboard = PILImage.new("L", (64, 64))
+    checkerboard.putdata([255 * ((x // 8 + y // 8) % 2) for y in range(64) for x in range(64)])
+    output = io.BytesIO()
+    checkerboard.save(output, format="PNG")
+    image_id = create_image(output.getvalue(), "damier.png", "image/png")
+    with SessionLocal() as db:
+        file_id = db.get(Image, image_id).file["file_id"]
+
+    generate_variants({"image_id": image_id, "file_id": file_id})
+
+    with SessionLocal() as db:
+        variantes = db.get(Image, image_id).variantes
+    assert variantes["width"] == 64 and len(variantes["renditions"]) == len(VARIANT_WIDTHS)
+    placeholder = base64.b64decode(variantes["placeholder"].split(",", 1)[1])
+    with PILImage.open(io.BytesIO(placeholder)) as blurred:
+        assert max(blurred.size) == VARIANT_PLACEHOLDER_SIZE
+        assert ImageStat.Stat(blurred.convert("L")).stddev[0] < ImageStat.Stat(checkerboard).stddev[0] / 2
@@ -0,0 +1,51 @@
+"""Cache des réponses : une invalidation pendant un chargement n'y laisse pas l'ancienne réponse."""
+import asyncio
+from typing import List
+
+from starlette.requests import Request
+
+from src.services.response_cache import MemoryBackend, ResponseCache
+
+
+def request(path: str = "/models/bois/") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def test_invalidation_during_load():
+    cache = ResponseCache(MemoryBackend())
+
+    async def scenario():
+        async def slow_loader():
+            # Écriture flushée puis commitée pendant la lecture : double invalidation
+            cache.invalidate(["bois"])
+            await asyncio.sleep(0)
+            cache.invalidate(["bois"])
+            return ["ancien"]
+
+        async def loader():
+            return ["nouveau"]
+
+        first = await cache.get_or_set("bois", request(), List[str], slow_loader)
+        second = await cache.get_or_set("bois", request(), List[str], loader)
+        return first.body, second.body
+
+    first, second = asyncio.run(scenario())
+    assert first == b'["ancien"]'
+    assert second == b'["nouveau"]'
+
+
+def test_cache_hit():
+    cache = ResponseCache(MemoryBackend())
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return ["valeur"]
+
+    async def scenario():
+        for _ in range(2):
+            response = await cache.get_or_set("rals", request("/models/rals/"), List[str], loader)
+        return response.body
+
+    assert asyncio.run(scenario()) == b'["valeur"]'
+    assert len(calls) == 1
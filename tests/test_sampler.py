@@ -0,0 +1,37 @@
+"""Profileur par échantillonnage : seuls les threads en attente de travail sont ignorés."""
+import queue
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from src.sampler import SamplingProfiler
+
+
+def sampled_threads(stacks) -> set:
+    return {stack[0] for stack in stacks}
+
+
+def test_pool_checkout_sampled_idle_queue_ignored(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0,
+                           pool_timeout=10)
+    work: queue.Queue = queue.Queue()
+    idle = threading.Thread(target=work.get, name="file-inactive", daemon=True)
+    held = engine.connect()
+    # Le pool est vide : ce thread attend une connexion (Condition.wait sous le pool SQLAlchemy)
+    waiting = threading.Thread(target=lambda: engine.connect().close(), name="attente-pool", daemon=True)
+    idle.start()
+    waiting.start()
+    profiler = SamplingProfiler(interval=0.01)
+    try:
+        stacks = profiler.profile(0.2)
+    finally:
+        held.close()
+        work.put(None)
+        waiting.join(5)
+        idle.join(5)
+        engine.dispose()
+
+    assert "attente-pool" in sampled_threads(stacks)
+    assert "file-inactive" not in sampled_threads(stacks)
+    assert profiler._labels == {}
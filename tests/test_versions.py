@@ -0,0 +1,36 @@
+"""Versions du catalogue (ETag) : incrément à chaque écriture, nouveau corps et nouvel ETag ensemble."""
+from sqlalchemy import delete, select
+
+from conftest import seed
+from src.database import SessionLocal
+from src.models.models import Bois, TableVersion
+
+
+def test_write_changes_body_and_etag(client, database):
+    seed(1)
+    before = client.get("/models/bois/")
+    assert before.status_code == 200
+    etag = before.headers["etag"]
+
+    with SessionLocal() as db:
+        bois = db.query(Bois).first()
+        bois.nom = "bois renommé"
+        db.commit()
+
+    after = client.get("/models/bois/", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert after.json()["items"][0]["nom"] == "bois renommé"
+    assert client.get("/models/bois/", headers={"If-None-Match": after.headers["etag"]}).status_code == 304
+
+
+def test_first_write_creates_version(database):
+    seed(1)
+    with SessionLocal() as db:
+        db.execute(delete(TableVersion))
+        db.commit()
+        for nom in ("premier", "second"):
+            db.query(Bois).first().nom = nom
+            db.commit()
+        versions = dict(db.execute(select(TableVersion.nom, TableVersion.version)).all())
+    assert versions == {"bois": 2, "produits": 2}